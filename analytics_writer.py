@@ -0,0 +1,164 @@
+# analytics_writer.py
+import logging
+import queue
+import threading
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .background import PeriodicWorker
+from .rollups import record_events
+
+logger = logging.getLogger(__name__)
+
+# Default batching and queue limits, overridable with CHATBOT_ANALYTICS
+DEFAULT_ANALYTICS_SETTINGS = {
+    'batch_size': 200,
+    'flush_interval': 2.0,  # Seconds
+    'max_queue_size': 10000,
+    'overflow_policy': 'drop_newest',  # 'drop_newest', 'drop_oldest' or 'block'
+    'block_timeout': 0.05,  # Seconds to wait for room under the 'block' policy
+}
+
+OVERFLOW_POLICIES = ('drop_newest', 'drop_oldest', 'block')
+
+
+class AnalyticsWriter:
+    """Write-behind queue for ChatAnalytics events.
+
+    Views enqueue events and return immediately; a background thread
+    persists them with bulk_create in batches and folds them into the
+    AnalyticsRollup counters in the same transaction. The queue is bounded and
+    the overflow policy decides what happens when it is full: drop the new
+    event, drop the oldest queued event, or block briefly for room.
+    """
+
+    def __init__(self, batch_size=200, flush_interval=2.0, max_queue_size=10000,
+                 overflow_policy='drop_newest', block_timeout=0.05):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._flush_lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.worker = PeriodicWorker('chatbot-analytics-writer', flush_interval, self.flush)
+
+    def record(self, session, event_type, event_data):
+        """Queue an analytics event for a session"""
+        event = (session.pk, event_type, event_data, timezone.now())
+
+        if self._put(event):
+            self.enqueued += 1
+        else:
+            self.dropped += 1
+
+        # Don't wait for the interval once a full batch is ready
+        if self._queue.qsize() >= self.batch_size:
+            self.worker.wake()
+        self.worker.start()
+
+    def _put(self, event):
+        if self.overflow_policy == 'block':
+            try:
+                self._queue.put(event, timeout=self.block_timeout)
+                return True
+            except queue.Full:
+                return False
+
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            if self.overflow_policy == 'drop_newest':
+                return False
+
+        # drop_oldest: make room by discarding the head of the queue
+        try:
+            self._queue.get_nowait()
+            self.dropped += 1
+        except queue.Empty:
+            pass
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+    def flush(self):
+        """Persist every queued event in bulk_create batches and update the rollups"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    break
+
+                try:
+                    self.write(batch)
+                    written += len(batch)
+                except IntegrityError as e:
+                    # One bad row (e.g. a deleted session) must not cost the whole batch
+                    logger.warning(f"Retrying {len(batch)} analytics events one by one: {str(e)}")
+                    for event in batch:
+                        try:
+                            self.write([event])
+                            written += 1
+                        except Exception as e:
+                            self.failed += 1
+                            logger.error(f"Failed to write analytics event {event[1]}: {str(e)}")
+                except Exception as e:
+                    self.failed += len(batch)
+                    logger.error(f"Failed to write {len(batch)} analytics events: {str(e)}")
+
+        self.written += written
+        return written
+
+    def write(self, batch):
+        """Insert a batch of events and fold them into the rollups in one transaction"""
+        # Imported lazily so the module can be loaded before apps are ready
+        from .models import ChatAnalytics
+
+        with transaction.atomic():
+            ChatAnalytics.objects.bulk_create([
+                ChatAnalytics(session_id=session_pk, event_type=event_type, event_data=event_data, timestamp=occurred_at)
+                for session_pk, event_type, event_data, occurred_at in batch
+            ])
+            record_events([
+                (event_type, event_data, occurred_at)
+                for session_pk, event_type, event_data, occurred_at in batch
+            ])
+
+    def metrics(self):
+        """Queue depth and lifetime counters for monitoring"""
+        return {
+            'queued': self._queue.qsize(),
+            'max_queue_size': self._queue.maxsize,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'batch_size': self.batch_size,
+            'flush_interval': self.flush_interval,
+            'overflow_policy': self.overflow_policy,
+        }
+
+
+def _build_analytics_writer():
+    options = dict(DEFAULT_ANALYTICS_SETTINGS)
+    options.update(getattr(settings, 'CHATBOT_ANALYTICS', {}))
+    return AnalyticsWriter(**options)
+
+
+# Process-wide writer used by the chatbot views
+analytics_writer = _build_analytics_writer()
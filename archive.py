@@ -0,0 +1,169 @@
+# archive.py
+import gzip
+import json
+import os
+import uuid
+from datetime import datetime
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# Default archive settings, overridable with CHATBOT_ARCHIVE
+DEFAULT_ARCHIVE_SETTINGS = {
+    'directory': None,  # Where segment files live; required to archive or read archives
+    'compression': 'gzip',  # 'gzip', or 'zstd' when the zstandard package is installed
+    'level': 6,  # Compression level
+    'segment_bytes': 64 * 1024 * 1024,  # A new segment is started past this size
+}
+
+# Message columns kept in the archive
+ARCHIVE_FIELDS = ('id', 'message_type', 'content', 'timestamp', 'is_read', 'metadata')
+
+
+def get_archive_settings():
+    """Merge CHATBOT_ARCHIVE from settings over the defaults"""
+    options = dict(DEFAULT_ARCHIVE_SETTINGS)
+    options.update(getattr(settings, 'CHATBOT_ARCHIVE', {}))
+    return options
+
+
+def archive_directory():
+    directory = get_archive_settings()['directory']
+    if not directory:
+        raise ImproperlyConfigured("CHATBOT_ARCHIVE['directory'] must be set to use the message archive")
+    return str(directory)
+
+
+def _json_default(value):
+    # Full-precision timestamps, so history cursors keep matching after archival
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+class GzipCodec:
+    """One gzip member per session; concatenated members are still a valid .gz file"""
+
+    suffix = '.gz'
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compress(self, data):
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def decompress(self, data):
+        return gzip.decompress(data)
+
+
+class ZstdCodec:
+    """One zstd frame per session, with the content size in the frame header"""
+
+    suffix = '.zst'
+
+    def __init__(self, level=6):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImproperlyConfigured('The zstandard package is required for zstd archives (pip install zstandard)')
+        self.compressor = zstandard.ZstdCompressor(level=level)
+        self.decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def decompress(self, data):
+        return self.decompressor.decompress(data)
+
+
+CODECS = {'gzip': GzipCodec, 'zstd': ZstdCodec}
+
+
+def get_codec(name, level=6):
+    try:
+        return CODECS[name](level)
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown archive compression {name!r} (use {', '.join(CODECS)})")
+
+
+def codec_for(segment):
+    """The codec a segment was written with, from its file name"""
+    return ZstdCodec() if segment.endswith(ZstdCodec.suffix) else GzipCodec()
+
+
+class SegmentWriter:
+    """Append archived sessions to size-bounded, compressed JSON Lines segments.
+
+    Each session becomes one self-contained compressed member holding its
+    messages as JSON Lines, so it can be read back with a single seek and
+    read. Next to every segment an ``.idx`` file gets one JSON line per
+    session with its offset and length, so segments can be indexed again
+    without the database.
+    """
+
+    def __init__(self, directory, compression='gzip', level=6, segment_bytes=DEFAULT_ARCHIVE_SETTINGS['segment_bytes']):
+        self.directory = directory
+        self.codec = get_codec(compression, level)
+        self.segment_bytes = segment_bytes
+        self.segment = None
+        self.data = None
+        self.index = None
+        self.sequence = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, session_id, messages):
+        """Archive one session's message rows; returns (segment, offset, length)"""
+        if self.data is None or self.data.tell() >= self.segment_bytes:
+            self.open_segment()
+
+        lines = b''.join(json.dumps(row, default=_json_default).encode() + b'\n' for row in messages)
+        member = self.codec.compress(lines)
+        offset = self.data.tell()
+        self.data.write(member)
+        self.index.write(json.dumps({
+            'session_id': session_id, 'offset': offset, 'length': len(member), 'messages': len(messages)
+        }) + '\n')
+        return self.segment, offset, len(member)
+
+    def open_segment(self):
+        self.close()
+        self.sequence += 1
+        self.segment = (
+            f'messages-{timezone.now():%Y%m%dT%H%M%S%f}-{os.getpid()}-{self.sequence}.jsonl{self.codec.suffix}'
+        )
+        path = os.path.join(self.directory, self.segment)
+        # Exclusive create: offsets are only valid in a file this writer started
+        self.data = open(path, 'xb')
+        self.index = open(f'{path}.idx', 'x', encoding='utf-8')
+
+    def sync(self):
+        """Make everything written so far durable, before rows are deleted"""
+        for f in (self.data, self.index):
+            if f is not None:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def close(self):
+        self.sync()
+        for f in (self.data, self.index):
+            if f is not None:
+                f.close()
+        self.data = self.index = None
+
+
+def read_archived_messages(segment, offset, length):
+    """The archived messages of one session as history rows, oldest first"""
+    with open(os.path.join(archive_directory(), segment), 'rb') as f:
+        f.seek(offset)
+        member = f.read(length)
+
+    rows = []
+    for line in codec_for(segment).decompress(member).splitlines():
+        row = json.loads(line)
+        row['id'] = uuid.UUID(row['id'])
+        row['timestamp'] = parse_datetime(row['timestamp'])
+        rows.append(row)
+    return rows
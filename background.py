@@ -0,0 +1,69 @@
+# background.py
+import atexit
+import logging
+import threading
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker:
+    """Daemon thread that calls a flush function every `interval` seconds.
+
+    The thread starts lazily on first use, so it is created after a
+    pre-forking server has forked its workers, and a final flush runs when
+    the process exits.
+    """
+
+    def __init__(self, name, interval, flush):
+        self.name = name
+        self.interval = interval
+        self.flush = flush
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the background thread if it is not running yet"""
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def stop(self, timeout=10):
+        """Stop the thread and run one last flush"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+
+        self._stop.set()
+        thread.join(timeout)
+        self.run_once()
+
+    def wake(self):
+        """Run the next flush now instead of waiting for the interval"""
+        self._stop.set()
+
+    def run_once(self):
+        """Flush once, logging rather than raising errors"""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"{self.name} flush failed: {str(e)}")
+        finally:
+            # Background threads hold their own connections; release them
+            connections.close_all()
+
+    def _run(self):
+        while self._thread is not None:
+            self._stop.wait(self.interval)
+            if self._thread is None:
+                break
+            self._stop.clear()
+            self.run_once()
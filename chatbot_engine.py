@@ -1,14 +1,43 @@
 # chatbot_engine.py
-import re
-import json
+import copy
+import logging
 import random
-from datetime import datetime
-from django.db import models
+import threading
+from types import MappingProxyType
+from .content_version import VersionWatch
+from .counters import faq_counters
+from .faq_index import get_faq_index
+from .intent_matcher import IntentMatcher
+from .metrics import observe_response
+from .quick_replies import get_quick_reply_catalog
+from .response_cache import build_response_cache, normalize_message
+from .timing import phase
+
+logger = logging.getLogger(__name__)
+
+# Cached responses embed FAQ answers and quick replies
+_content_watch = VersionWatch('faq', 'quick_reply')
+
+
+def _freeze(value):
+    """Recursively turn dicts into read-only mappings and lists into tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
 
 class ChatbotEngine:
-    def __init__(self):
+    """Immutable intent/response snapshot shared by every request.
+
+    Build one per process through get_engine(); to change the intent
+    configuration, construct a new engine and install it with swap_engine().
+    """
+
+    def __init__(self, intents=None, responses=None, specific_responses=None, response_cache=None):
         # Intent definitions with patterns and keywords
-        self.intents = {
+        default_intents = {
             'login_help': {
                 'patterns': ['login', 'log in', 'sign in', 'signin', 'cant login', 'unable to login', 'login problem', 'access'],
                 'keywords': ['login', 'signin', 'access', 'account', 'credentials', 'username', 'authenticate']
@@ -52,91 +81,51 @@ class ChatbotEngine:
         }
         
         # Bot responses for each intent
-        self.responses = {
+        default_responses = {
             'login_help': {
                 'message': "I can help you with login issues! Here are the most common solutions:",
-                'quick_replies': [
-                    {'title': 'Forgot Username', 'payload': 'forgot_username'},
-                    {'title': 'Account Locked', 'payload': 'account_locked'},
-                    {'title': 'Invalid Credentials', 'payload': 'invalid_credentials'},
-                    {'title': 'Two-Factor Issues', 'payload': '2fa_issues'}
-                ]
+                'quick_reply_category': 'login'
             },
             'password_reset': {
                 'message': "I'll guide you through the password reset process:\n\n1. Go to the login page\n2. Click 'Forgot Password?'\n3. Enter your email address\n4. Check your email for reset instructions\n5. Follow the link and create a new password\n\nIf you don't receive the email, check your spam folder or try again in a few minutes.",
-                'quick_replies': [
-                    {'title': 'No Reset Email', 'payload': 'no_reset_email'},
-                    {'title': 'Reset Link Expired', 'payload': 'reset_link_expired'},
-                    {'title': 'Password Requirements', 'payload': 'password_requirements'}
-                ]
+                'quick_reply_category': 'password'
             },
             'account_details': {
                 'message': "You can update your account information in several ways:",
-                'quick_replies': [
-                    {'title': 'Change Email', 'payload': 'change_email'},
-                    {'title': 'Update Phone', 'payload': 'update_phone'},
-                    {'title': 'Personal Info', 'payload': 'personal_info'},
-                    {'title': 'Delete Account', 'payload': 'delete_account'}
-                ]
+                'quick_reply_category': 'account'
             },
             'signup_help': {
                 'message': "Creating a new account is easy! Here's what you need:",
-                'quick_replies': [
-                    {'title': 'Email Verification', 'payload': 'email_verification'},
-                    {'title': 'Account Activation', 'payload': 'account_activation'},
-                    {'title': 'Registration Issues', 'payload': 'registration_issues'}
-                ]
+                'quick_reply_category': 'signup'
             },
             'security': {
                 'message': "Security is important! Here are our security features:",
-                'quick_replies': [
-                    {'title': 'Enable 2FA', 'payload': 'enable_2fa'},
-                    {'title': 'Security Tips', 'payload': 'security_tips'},
-                    {'title': 'Suspicious Activity', 'payload': 'suspicious_activity'}
-                ]
+                'quick_reply_category': 'security'
             },
             'billing': {
                 'message': "I can help you with billing and payment questions:",
-                'quick_replies': [
-                    {'title': 'View Invoice', 'payload': 'view_invoice'},
-                    {'title': 'Update Payment', 'payload': 'update_payment'},
-                    {'title': 'Refund Request', 'payload': 'refund_request'},
-                    {'title': 'Billing Issues', 'payload': 'billing_issues'}
-                ]
+                'quick_reply_category': 'billing'
             },
             'technical': {
                 'message': "I'm here to help with technical issues. Let me know more details:",
-                'quick_replies': [
-                    {'title': 'Report Bug', 'payload': 'report_bug'},
-                    {'title': 'Performance Issues', 'payload': 'performance_issues'},
-                    {'title': 'Feature Not Working', 'payload': 'feature_not_working'},
-                    {'title': 'Browser Issues', 'payload': 'browser_issues'}
-                ]
+                'quick_reply_category': 'technical'
             },
             'greeting': {
                 'message': "Hello! I'm here to help you with any questions about login, passwords, account details, and more. What can I assist you with today?",
-                'quick_replies': [
-                    {'title': '🔐 Login Issues', 'payload': 'login_help'},
-                    {'title': '🔑 Password Reset', 'payload': 'password_reset'},
-                    {'title': '👤 Account Details', 'payload': 'account_details'},
-                    {'title': '📝 Sign Up Help', 'payload': 'signup_help'}
-                ]
+                'quick_reply_category': 'greeting'
             },
             'goodbye': {
                 'message': "Thank you for using our support chat! If you need more help, just start a new conversation. Have a great day!",
-                'quick_replies': []
+                'quick_reply_category': 'goodbye'
             },
             'escalate': {
                 'message': "I understand you'd like to speak with a human agent. I'm transferring you now...\n\n⏱️ **Estimated wait time: 3-5 minutes**\n\nWhile you wait, I can still help with common questions. Is there anything specific I can assist with?",
-                'quick_replies': [
-                    {'title': 'Continue with Bot', 'payload': 'continue_bot'},
-                    {'title': 'Cancel Transfer', 'payload': 'cancel_transfer'}
-                ]
+                'quick_reply_category': 'escalate'
             }
         }
 
         # Specific responses for detailed help
-        self.specific_responses = {
+        default_specific_responses = {
             'forgot_username': "To recover your username:\n\n1. Visit the login page\n2. Click 'Forgot Username?'\n3. Enter your email address\n4. Check your email for your username\n\nIf you don't receive it, contact support at support@company.com",
             
             'account_locked': "If your account is locked:\n\n1. Wait 15 minutes and try again\n2. Ensure you're using the correct credentials\n3. Clear your browser cache\n4. Try from a different device\n\nIf it's still locked, I can help unlock it for you.",
@@ -168,10 +157,59 @@ class ChatbotEngine:
             'browser_issues': "Common browser fixes:\n\n1. Clear cache and cookies\n2. Disable browser extensions\n3. Try incognito/private mode\n4. Update your browser\n5. Try a different browser\n\nWhich browser are you using?"
         }
 
+        # Frozen tables make the engine safe to share across threads
+        self.intents = _freeze(intents if intents is not None else default_intents)
+        self.responses = _freeze(responses if responses is not None else default_responses)
+        self.specific_responses = _freeze(
+            specific_responses if specific_responses is not None else default_specific_responses
+        )
+
+        # Compile every pattern and keyword into one matcher
+        self.matcher = IntentMatcher(self.intents)
+
+        # Each snapshot gets its own cache, so swapping engines invalidates it
+        self.response_cache = response_cache if response_cache is not None else build_response_cache()
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError('ChatbotEngine is immutable; build a new engine and install it with swap_engine()')
+        super().__setattr__(name, value)
+
     def process_message(self, message, session):
         """Process user message and return appropriate response"""
-        message_lower = message.lower().strip()
+        message_lower = normalize_message(message)
         
+        # Repeated inputs are answered from the response cache
+        with phase('cache'):
+            if _content_watch.changed():
+                self.response_cache.clear()
+            cached = self.response_cache.get(message_lower)
+        if cached is not None:
+            response = self._from_cache(cached, message_lower)
+            observe_response(response, cached=True)
+            return response
+        
+        response = self._build_response(message_lower)
+        self.response_cache.set(message_lower, copy.deepcopy(response))
+        observe_response(response, cached=False)
+        return response
+
+    def _from_cache(self, cached, message):
+        """Rebuild a response from a cache entry, replaying its side effects"""
+        response_type = cached['metadata'].get('type')
+        
+        # Pick a fresh random default instead of repeating the cached one
+        if response_type == 'default_response':
+            return self.get_default_response(message)
+        
+        if response_type == 'faq_response':
+            self.record_faq_view(cached['metadata']['faq_id'])
+        
+        return copy.deepcopy(cached)
+
+    def _build_response(self, message_lower):
+        """Work out the response for a normalized message"""
         # Check for specific payload responses first
         if message_lower in self.specific_responses:
             return {
@@ -181,25 +219,37 @@ class ChatbotEngine:
                 'metadata': {'type': 'specific_response'}
             }
         
-        # Detect intent from user message
-        intent = self.detect_intent(message_lower)
-        confidence = self.calculate_confidence(message_lower, intent)
+        # Score every intent in a single pass over the message
+        with phase('intent'):
+            ranked = self.score_intents(message_lower)
         
         # Get response based on detected intent
-        if intent in self.responses:
+        if ranked and ranked[0][0] in self.responses:
+            intent, score, confidence = ranked[0]
             response_data = self.responses[intent]
+            metadata = {
+                'quick_replies': self.get_quick_replies(response_data),
+                'type': 'intent_response'
+            }
+            
+            # Runner-up intents let the client offer a "did you mean" choice
+            if len(ranked) > 1:
+                metadata['alternative_intents'] = [
+                    {'intent': alt_intent, 'confidence': alt_confidence}
+                    for alt_intent, alt_score, alt_confidence in ranked[1:]
+                ]
+                metadata['quick_replies'].extend(self.get_disambiguation_replies(ranked))
+            
             return {
                 'content': response_data['message'],
                 'intent': intent,
                 'confidence': confidence,
-                'metadata': {
-                    'quick_replies': response_data.get('quick_replies', []),
-                    'type': 'intent_response'
-                }
+                'metadata': metadata
             }
         
         # Search FAQs if no intent matched
-        faq_result = self.search_faqs(message_lower)
+        with phase('faq'):
+            faq_result = self.search_faqs(message_lower)
         if faq_result:
             return {
                 'content': f"**{faq_result['question']}**\n\n{faq_result['answer']}",
@@ -219,97 +269,91 @@ class ChatbotEngine:
         # Default response when nothing matches
         return self.get_default_response(message_lower)
 
-    def detect_intent(self, message):
-        """Detect user intent from message using pattern matching"""
-        best_intent = None
-        best_score = 0
+    def get_quick_replies(self, response_data):
+        """Quick replies for a response, from the catalog when it names a category"""
+        category = response_data.get('quick_reply_category')
+        if category:
+            return get_quick_reply_catalog().replies(category)
+        return [dict(reply) for reply in response_data.get('quick_replies', ())]
+
+    def score_intents(self, message, top_k=3):
+        """Score all intents in one pass and return the top-k (intent, score, confidence) tuples"""
+        word_count = len(message.split())
+        ranked = []
         
-        for intent, data in self.intents.items():
-            score = 0
-            
-            # Check exact pattern matches (higher weight)
-            for pattern in data['patterns']:
-                if pattern in message:
-                    score += 3
-            
-            # Check keyword matches (lower weight)
-            for keyword in data['keywords']:
-                if keyword in message:
-                    score += 1
-            
-            # Bonus for multiple matches
-            if score > 2:
-                score += 1
-            
-            if score > best_score:
-                best_score = score
-                best_intent = intent
+        # Intents come back in definition order so earlier intents win ties
+        for intent, (pattern_hits, keyword_hits) in self.matcher.match(message).items():
+            ranked.append((
+                intent,
+                self._intent_score(pattern_hits, keyword_hits),
+                self._intent_confidence(pattern_hits, keyword_hits, word_count)
+            ))
         
-        return best_intent if best_score > 0 else None
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        return ranked[:top_k]
+
+    def detect_intent(self, message):
+        """Detect user intent from message using pattern matching"""
+        ranked = self.score_intents(message, top_k=1)
+        return ranked[0][0] if ranked else None
 
     def calculate_confidence(self, message, intent):
         """Calculate confidence score for intent detection"""
         if not intent:
             return 0.0
         
-        word_count = len(message.split())
-        matches = sum(1 for pattern in self.intents[intent]['patterns'] if pattern in message)
-        keyword_matches = sum(1 for keyword in self.intents[intent]['keywords'] if keyword in message)
+        matches, keyword_matches = self.matcher.match(message).get(intent, (0, 0))
+        return self._intent_confidence(matches, keyword_matches, len(message.split()))
+
+    def _intent_score(self, pattern_hits, keyword_hits):
+        """Weight exact pattern matches above keyword matches"""
+        score = pattern_hits * 3 + keyword_hits
         
-        # Calculate confidence based on matches and message length
-        total_matches = matches * 2 + keyword_matches
+        # Bonus for multiple matches
+        if score > 2:
+            score += 1
+        
+        return score
+
+    def _intent_confidence(self, pattern_hits, keyword_hits, word_count):
+        """Confidence based on matches and message length"""
+        total_matches = pattern_hits * 2 + keyword_hits
         confidence = min(total_matches / max(word_count * 0.5, 1), 1.0)
         
         return round(confidence, 2)
 
+    def get_disambiguation_replies(self, ranked):
+        """Offer runner-up intents that scored as high as the winner"""
+        best_score = ranked[0][1]
+        return [
+            {'title': f"Did you mean: {intent.replace('_', ' ').title()}?", 'payload': intent}
+            for intent, score, confidence in ranked[1:]
+            if score == best_score
+        ]
+
     def search_faqs(self, message):
         """Search FAQs for relevant answers"""
         try:
-            # Import here to avoid circular imports
-            from .models import FAQ
-            
-            faqs = FAQ.objects.filter(is_active=True).order_by('-priority', '-helpful_votes')
-            
-            best_faq = None
-            best_score = 0
-            
-            for faq in faqs:
-                score = 0
-                message_words = message.split()
-                
-                # Check question similarity
-                question_words = faq.question.lower().split()
-                common_words = set(message_words) & set(question_words)
-                score += len(common_words) * 2
-                
-                # Check keyword matches
-                for keyword in faq.keywords:
-                    if keyword.lower() in message:
-                        score += 2
-                
-                # Bonus for high-priority FAQs
-                score += faq.priority * 0.5
-                
-                if score > best_score and score >= 2:  # Minimum threshold
-                    best_score = score
-                    best_faq = faq
+            best_faq = get_faq_index().search(message)
             
             if best_faq:
-                # Increment view count
-                best_faq.view_count += 1
-                best_faq.save()
+                self.record_faq_view(best_faq['id'])
                 
                 return {
-                    'id': str(best_faq.id),
-                    'question': best_faq.question,
-                    'answer': best_faq.answer,
-                    'category': best_faq.category
+                    'id': str(best_faq['id']),
+                    'question': best_faq['question'],
+                    'answer': best_faq['answer'],
+                    'category': best_faq['category']
                 }
         except Exception as e:
-            print(f"Error searching FAQs: {e}")
+            logger.error(f"Error searching FAQs: {str(e)}")
         
         return None
 
+    def record_faq_view(self, faq_id):
+        """Count an FAQ view; buffered and flushed as a batched F() update"""
+        faq_counters.increment(faq_id, 'view_count')
+
     def get_default_response(self, message):
         """Return default response when no intent is detected"""
         default_responses = [
@@ -325,12 +369,40 @@ class ChatbotEngine:
             'confidence': 0.0,
             'metadata': {
                 'type': 'default_response',
-                'quick_replies': [
-                    {'title': '🔐 Login Help', 'payload': 'login_help'},
-                    {'title': '🔑 Password Issues', 'payload': 'password_reset'},
-                    {'title': '👤 Account Questions', 'payload': 'account_details'},
-                    {'title': '💳 Billing Help', 'payload': 'billing'},
-                    {'title': '🙋 Talk to Human', 'payload': 'escalate'}
-                ]
+                'quick_replies': get_quick_reply_catalog().replies('default')
             }
         }
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Return the process-wide engine, compiling it on first use"""
+    global _engine
+
+    engine = _engine
+    if engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = ChatbotEngine()
+            engine = _engine
+    return engine
+
+
+def swap_engine(engine):
+    """Atomically install a newly compiled engine and return the old one"""
+    global _engine
+
+    with _engine_lock:
+        previous = _engine
+        _engine = engine
+    return previous
+
+
+def clear_response_cache():
+    """Drop cached responses of the installed engine, e.g. after FAQ changes"""
+    engine = _engine
+    if engine is not None:
+        engine.response_cache.clear()
@@ -0,0 +1,156 @@
+# content_version.py
+import hashlib
+import threading
+import time
+import uuid
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+# Cache alias and lifetimes, overridable with CHATBOT_CONTENT_CACHE
+DEFAULT_CONTENT_CACHE_SETTINGS = {
+    'alias': 'default',
+    'body_timeout': 300,  # Seconds a serialized response body is kept
+    'max_age': 60,  # Cache-Control max-age sent to clients
+    'recheck_interval': 5.0,  # Seconds between checks of the versions by per-process caches
+}
+
+
+def _options():
+    options = dict(DEFAULT_CONTENT_CACHE_SETTINGS)
+    options.update(getattr(settings, 'CHATBOT_CONTENT_CACHE', {}))
+    return options
+
+
+def _cache():
+    return caches[_options()['alias']]
+
+
+def is_shared_cache():
+    """Whether content versions are visible to other processes"""
+    return not isinstance(_cache(), LocMemCache)
+
+
+def _version_key(kind):
+    return f"chatbot:content-version:{kind}"
+
+
+def get_content_version(kind):
+    """Current {'version', 'modified'} stamp for a kind of content ('faq', 'faq_counters', 'quick_reply').
+
+    Stamps live in the CHATBOT_CONTENT_CACHE cache, so reading one costs a
+    cache lookup and no query. With several worker processes that cache
+    must be shared (Redis, Memcached or the database cache) for them to
+    agree on the stamp.
+    """
+    cache = _cache()
+    stamp = cache.get(_version_key(kind))
+    if stamp is None:
+        # First reader after a cache flush starts a fresh version
+        cache.add(_version_key(kind), {'version': uuid.uuid4().hex, 'modified': timezone.now()}, None)
+        stamp = cache.get(_version_key(kind))
+    return stamp
+
+
+def bump_content_version(kind):
+    """Start a new version for a kind of content; called whenever its rows change"""
+    _cache().set(_version_key(kind), {'version': uuid.uuid4().hex, 'modified': timezone.now()}, None)
+
+
+class VersionWatch:
+    """Tells a per-process cache that content it was built from changed in any process.
+
+    The FAQ index, quick reply catalog and response cache are held per
+    process, and the signals that drop them only fire in the process that
+    saved the rows. A watch compares the shared content versions with the
+    ones it last saw, reading them at most every recheck_interval seconds,
+    so changes made by other workers, the admin or bulk loads are picked
+    up within that interval.
+    """
+
+    def __init__(self, *kinds):
+        self.kinds = kinds
+        self._seen = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def due(self):
+        """Whether the next changed() call will read the versions"""
+        checked_at = self._checked_at
+        return checked_at is None or time.monotonic() - checked_at >= _options()['recheck_interval']
+
+    def changed(self):
+        """True when a watched version moved since the previous check"""
+        if not self.due():
+            return False
+
+        versions = tuple(get_content_version(kind)['version'] for kind in self.kinds)
+        with self._lock:
+            changed = self._seen is not None and versions != self._seen
+            self._seen = versions
+            self._checked_at = time.monotonic()
+        return changed
+
+
+def _request_stamp(kinds, request):
+    """Combined stamp of several kinds of content, kept on the request"""
+    stamps = getattr(request, '_chatbot_content_versions', None)
+    if stamps is None:
+        stamps = request._chatbot_content_versions = {}
+    if kinds not in stamps:
+        parts = [get_content_version(kind) for kind in kinds]
+        stamps[kinds] = {
+            'version': ':'.join(part['version'] for part in parts),
+            'modified': max(part['modified'] for part in parts),
+        }
+    return stamps[kinds]
+
+
+def _request_signature(kinds, request):
+    version = _request_stamp(kinds, request)['version']
+    query = '&'.join(f"{key}={value}" for key, value in sorted(request.GET.items()))
+    return hashlib.sha1(f"{','.join(kinds)}:{version}:{query}".encode()).hexdigest()
+
+
+def conditional_content(*kinds):
+    """Serve a read-only JSON view with validators and a server-side body cache.
+
+    The ETag hashes the versions of every kind of content in the body with
+    the query string, and Last-Modified is the time of the latest bump, so
+    a matching If-None-Match or If-Modified-Since is answered with 304 Not
+    Modified from the cache alone, before the view or the ORM runs.
+    Successful bodies are cached per version. Every change to the content,
+    including counter flushes, bumps its version, so neither clients nor
+    the body cache keep a stale body.
+    """
+    def decorator(view):
+        @condition(
+            etag_func=lambda request, *args, **kwargs: _request_signature(kinds, request),
+            last_modified_func=lambda request, *args, **kwargs: _request_stamp(kinds, request)['modified'],
+        )
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            options = _options()
+            cache = _cache()
+            body_key = f"chatbot:content-body:{_request_signature(kinds, request)}"
+
+            body = cache.get(body_key)
+            if body is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cache.set(body_key, response.content, options['body_timeout'])
+            else:
+                response = HttpResponse(body, content_type='application/json')
+
+            patch_cache_control(response, public=True, max_age=options['max_age'])
+            return response
+
+        return wrapped
+
+    return decorator
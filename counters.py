@@ -0,0 +1,115 @@
+# counters.py
+import threading
+import time
+from django.conf import settings
+from django.db.models import F
+from .background import PeriodicWorker
+from .content_version import bump_content_version
+
+# Default flush cadence, overridable with CHATBOT_COUNTERS
+DEFAULT_COUNTER_SETTINGS = {
+    'flush_interval': 5.0,  # Seconds
+    'batch_size': 500,  # FAQs per UPDATE statement
+}
+
+
+class FAQCounterBuffer:
+    """Accumulates FAQ view and vote increments in memory.
+
+    Increments are merged per FAQ and flushed periodically as atomic
+    F() updates, so hot FAQ rows are no longer rewritten (answer text and
+    all) on every hit and concurrent increments are never lost.
+    """
+
+    FIELDS = ('view_count', 'helpful_votes', 'not_helpful_votes')
+
+    def __init__(self, flush_interval=5.0, batch_size=500):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.flushed_increments = 0
+        self.last_flush_at = None
+        self.worker = PeriodicWorker('chatbot-faq-counters', flush_interval, self.flush)
+
+    def increment(self, faq_id, field, amount=1):
+        """Queue an increment of one counter field on an FAQ"""
+        if field not in self.FIELDS:
+            raise ValueError(f"Unknown FAQ counter: {field}")
+
+        with self._lock:
+            counts = self._pending.setdefault(str(faq_id), {})
+            counts[field] = counts.get(field, 0) + amount
+
+        self.worker.start()
+
+    def pending_count(self):
+        """Total number of increments waiting to be flushed"""
+        with self._lock:
+            return sum(sum(counts.values()) for counts in self._pending.values())
+
+    def flush(self):
+        """Write all pending increments and return how many were applied"""
+        # Imported lazily so the module can be loaded before apps are ready
+        from .models import FAQ
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        # FAQs sharing the same deltas are updated with a single statement;
+        # ids are sorted so concurrent flushers lock rows in the same order
+        groups = {}
+        for faq_id in sorted(pending):
+            deltas = tuple(sorted(pending[faq_id].items()))
+            groups.setdefault(deltas, []).append(faq_id)
+
+        try:
+            for deltas, faq_ids in groups.items():
+                for start in range(0, len(faq_ids), self.batch_size):
+                    FAQ.objects.filter(id__in=faq_ids[start:start + self.batch_size]).update(
+                        **{field: F(field) + amount for field, amount in deltas}
+                    )
+        except Exception:
+            # Put everything back so the next flush retries it
+            self._merge(pending)
+            raise
+
+        # The counts are part of the FAQ endpoint's body, so its ETag must change
+        bump_content_version('faq_counters')
+
+        applied = sum(sum(counts.values()) for counts in pending.values())
+        self.flushed_increments += applied
+        self.last_flush_at = time.time()
+        return applied
+
+    def _merge(self, pending):
+        with self._lock:
+            for faq_id, counts in pending.items():
+                current = self._pending.setdefault(faq_id, {})
+                for field, amount in counts.items():
+                    current[field] = current.get(field, 0) + amount
+
+    def metrics(self):
+        """Flush interval and pending/flushed counts for monitoring"""
+        with self._lock:
+            pending_faqs = len(self._pending)
+            pending_increments = sum(sum(counts.values()) for counts in self._pending.values())
+        return {
+            'flush_interval': self.flush_interval,
+            'pending_faqs': pending_faqs,
+            'pending_increments': pending_increments,
+            'flushed_increments': self.flushed_increments,
+            'last_flush_at': self.last_flush_at,
+        }
+
+
+def _build_faq_counters():
+    options = dict(DEFAULT_COUNTER_SETTINGS)
+    options.update(getattr(settings, 'CHATBOT_COUNTERS', {}))
+    return FAQCounterBuffer(flush_interval=options['flush_interval'], batch_size=options['batch_size'])
+
+
+# Process-wide buffer for FAQ view and vote counters
+faq_counters = _build_faq_counters()
@@ -0,0 +1,11 @@
+# apps.py
+from django.apps import AppConfig
+
+
+class ChatbotConfig(AppConfig):
+    name = 'chatbot'
+    verbose_name = 'Chatbot'
+
+    def ready(self):
+        # Connect model signal handlers
+        from . import signals  # noqa: F401
@@ -0,0 +1,207 @@
+# consumers.py
+import json
+import logging
+import time
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+from .chatbot_engine import get_engine
+from .metrics import observe_request
+from .models import ChatSession
+from .session_cache import adeactivate_session, aresolve_session, is_expired
+from .views import ChatbotView
+
+logger = logging.getLogger(__name__)
+
+# Default WebSocket settings, overridable with CHATBOT_WEBSOCKET
+DEFAULT_WEBSOCKET_SETTINGS = {
+    # Seconds the session resolved on a connection is trusted before it is
+    # looked up again, so deactivations elsewhere are noticed
+    'session_recheck': 60.0,
+    'max_frame_bytes': 16384,  # Larger frames are rejected unparsed
+}
+
+
+def get_websocket_settings():
+    """Merge CHATBOT_WEBSOCKET from settings over the defaults"""
+    options = dict(DEFAULT_WEBSOCKET_SETTINGS)
+    options.update(getattr(settings, 'CHATBOT_WEBSOCKET', {}))
+    return options
+
+
+class ScopeRequest:
+    """Request stand-in built from the WebSocket scope, for the view handlers"""
+
+    def __init__(self, scope):
+        headers = {name.decode('latin1').lower(): value.decode('latin1') for name, value in scope.get('headers', [])}
+        client = scope.get('client') or (None, None)
+        self.META = {
+            'HTTP_USER_AGENT': headers.get('user-agent', ''),
+            'REMOTE_ADDR': client[0],
+        }
+        if 'x-forwarded-for' in headers:
+            self.META['HTTP_X_FORWARDED_FOR'] = headers['x-forwarded-for']
+
+
+class ChatConsumer(AsyncWebsocketConsumer):
+    """WebSocket transport for the chat API actions.
+
+    Frames carry the same JSON as the HTTP API plus an optional
+    ``request_id`` that is echoed in the reply, with the HTTP status code
+    in ``status``. The session used on a connection is kept on it, so
+    messages after the first skip the session lookup. Each connection joins
+    a channel layer group for its session, and exchanges are pushed to the
+    session's other connections (e.g. a second browser tab).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.view = ChatbotView()
+        self.options = get_websocket_settings()
+        self.session = None
+        self.session_checked = 0.0
+        self.group_name = None
+
+    async def connect(self):
+        self.request = ScopeRequest(self.scope)
+        await self.accept()
+
+    async def disconnect(self, code):
+        await self.leave_group()
+
+    async def receive(self, text_data=None, bytes_data=None):
+        """Parse a frame, run its action and send the reply"""
+        started = time.perf_counter()
+        action, request_id = None, None
+        try:
+            if text_data is None or len(text_data) > self.options['max_frame_bytes']:
+                status, body = 400, {'error': 'Frames must be JSON text of at most '
+                                              f"{self.options['max_frame_bytes']} bytes"}
+            else:
+                data = json.loads(text_data)
+                if not isinstance(data, dict):
+                    raise ValueError('Expected a JSON object')
+                action = data.get('action')
+                request_id = data.get('request_id')
+                status, body = await self.handle_action(action, data)
+        except ValueError:
+            # json.JSONDecodeError is a ValueError
+            status, body = 400, {'error': 'Invalid JSON format'}
+        except Exception as e:
+            logger.error(f"Chatbot WebSocket error: {str(e)}")
+            status, body = 500, {'error': 'Internal server error'}
+
+        observe_request(action, status, time.perf_counter() - started)
+        await self.send(text_data=json.dumps(dict(body, request_id=request_id, status=status)))
+
+    async def handle_action(self, action, data):
+        """Route an action to its handler; returns (status, body)"""
+        if action == 'send_message':
+            return await self.send_message(data)
+        elif action == 'start_session':
+            status, body = await self.call_view(self.view.start_session, data)
+            if status == 200:
+                await self.bind_session(body['session_id'])
+            return status, body
+        elif action == 'submit_feedback':
+            return await self.call_view(self.view.submit_feedback, data)
+        elif action == 'get_session_history':
+            return await self.call_view(self.view.get_session_history, data)
+        else:
+            return 400, {
+                'error': 'Invalid action',
+                'valid_actions': ['start_session', 'send_message', 'submit_feedback', 'get_session_history']
+            }
+
+    async def call_view(self, handler, data):
+        """Run a ChatbotView action handler and unpack its JsonResponse"""
+        response = await database_sync_to_async(handler)(self.request, data)
+        return response.status_code, json.loads(response.content)
+
+    async def bind_session(self, session_id):
+        """The session for session_id, reusing the one held on this connection.
+
+        Raises ChatSession.DoesNotExist for unknown or inactive sessions.
+        """
+        now = time.monotonic()
+        session = self.session
+        if session is None or session.session_id != session_id or now - self.session_checked > self.options['session_recheck']:
+            try:
+                session = await aresolve_session(session_id)
+            except ChatSession.DoesNotExist:
+                if self.session is not None and self.session.session_id == session_id:
+                    self.session = None
+                raise
+            self.session_checked = now
+            if self.session is None or self.session.session_id != session_id:
+                await self.join_group(session_id)
+            self.session = session
+        return session
+
+    async def send_message(self, data):
+        """Process a user message on the connection's session"""
+        try:
+            session_id = data.get('session_id') or (self.session.session_id if self.session else None)
+            content = data.get('content', '').strip()
+
+            # Validate input
+            error = self.view.validate_message(session_id, content)
+            if error:
+                return 400, {'error': error}
+
+            session = await self.bind_session(session_id)
+
+            # Check session age (expire after 24 hours)
+            if is_expired(session):
+                await adeactivate_session(session)
+                self.session = None
+                return 401, {'error': 'Session expired. Please start a new session.'}
+
+            # Score the message in a worker thread, off the event loop
+            process_message = sync_to_async(get_engine().process_message, thread_sensitive=False)
+            bot_response = await process_message(content, session)
+
+            # Store both messages and touch the session in one transaction
+            user_message, bot_message = await database_sync_to_async(self.view.save_exchange)(
+                session, content, bot_response
+            )
+
+            # Log analytics
+            self.view.record_message_sent(session, content, bot_response)
+
+            body = self.view.exchange_body(user_message, bot_message)
+            await self.broadcast(body)
+            return 200, body
+
+        except ChatSession.DoesNotExist:
+            return 404, {'error': 'Invalid session ID'}
+        except Exception as e:
+            logger.error(f"Error processing WebSocket message: {str(e)}")
+            return 500, {'error': 'Failed to process message'}
+
+    async def join_group(self, session_id):
+        """Move this connection to the channel layer group of a session"""
+        await self.leave_group()
+        if self.channel_layer is not None:
+            self.group_name = f'chatbot.session.{session_id}'
+            await self.channel_layer.group_add(self.group_name, self.channel_name)
+
+    async def leave_group(self):
+        if self.group_name is not None:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            self.group_name = None
+
+    async def broadcast(self, body):
+        """Push an exchange to the session's other connections"""
+        if self.group_name is not None:
+            await self.channel_layer.group_send(self.group_name, {
+                'type': 'chat.exchange',
+                'sender': self.channel_name,
+                'body': body,
+            })
+
+    async def chat_exchange(self, event):
+        """Channel layer handler: forward another connection's exchange"""
+        if event['sender'] != self.channel_name:
+            await self.send(text_data=json.dumps(dict(event['body'], event='exchange')))
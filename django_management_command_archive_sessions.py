@@ -0,0 +1,165 @@
+# management/commands/archive_sessions.py
+import time
+from datetime import timedelta
+from itertools import groupby, islice
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from chatbot.archive import ARCHIVE_FIELDS, SegmentWriter, get_archive_settings
+from chatbot.models import ChatSession, Message, UserFeedback
+
+
+class Command(BaseCommand):
+    help = 'Move the messages of closed sessions into compressed JSON Lines segment files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=float,
+            default=30,
+            help='Archive inactive sessions with no activity for this many days',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of sessions archived per chunk',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of messages removed per DELETE statement, each committed on its own',
+        )
+        parser.add_argument(
+            '--directory',
+            help="Segment directory (default: CHATBOT_ARCHIVE['directory'])",
+        )
+        parser.add_argument(
+            '--compression',
+            choices=('gzip', 'zstd'),
+            help="Segment compression (default: CHATBOT_ARCHIVE['compression'])",
+        )
+        parser.add_argument(
+            '--time-limit',
+            type=float,
+            help='Stop after the chunk running when this many seconds have passed; the next run resumes',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--chunk-size and --batch-size must be positive')
+
+        archive_settings = get_archive_settings()
+        directory = options['directory'] or archive_settings['directory']
+        if not directory:
+            raise CommandError("Set CHATBOT_ARCHIVE['directory'] or pass --directory")
+        if options['directory'] and str(options['directory']) != str(archive_settings['directory']):
+            self.stdout.write(self.style.WARNING(
+                "⚠️  History is read from CHATBOT_ARCHIVE['directory']; move the segments there before serving them"
+            ))
+
+        try:
+            writer = SegmentWriter(
+                str(directory),
+                compression=options['compression'] or archive_settings['compression'],
+                level=archive_settings['level'],
+                segment_bytes=archive_settings['segment_bytes'],
+            )
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        deadline = time.monotonic() + options['time_limit'] if options['time_limit'] else None
+        self.counts = {'sessions': 0, 'messages': 0, 'bytes': 0}
+        stopped = False
+        started = time.perf_counter()
+
+        # Messages an interrupted run archived but did not get to delete
+        leftover = self.delete_in_batches(
+            Message.objects.filter(session__archived_at__isnull=False), options['batch_size']
+        )
+        if leftover:
+            self.stdout.write(f'🧹 Removed {leftover} already archived messages left by an interrupted run')
+
+        # Closed sessions are streamed oldest first; archived ones drop out of the filter
+        sessions = ChatSession.objects.filter(
+            is_active=False, archived_at__isnull=True, updated_at__lt=cutoff
+        ).order_by('updated_at', 'pk').values_list('pk', 'session_id').iterator(chunk_size=options['chunk_size'])
+
+        try:
+            while True:
+                if deadline is not None and time.monotonic() >= deadline:
+                    stopped = True
+                    break
+                chunk = list(islice(sessions, options['chunk_size']))
+                if not chunk:
+                    break
+                self.archive(writer, dict(chunk), options)
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"  • {self.counts['sessions']} sessions archived")
+        finally:
+            writer.close()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"📦 Archived {self.counts['messages']} messages from {self.counts['sessions']} sessions "
+            f"into {self.counts['bytes'] / 1024:.1f} KiB of segments"
+        )
+        self.stdout.write(
+            f"📊 {elapsed:.2f}s ({self.counts['messages'] / elapsed if elapsed else 0:.0f} messages/s)"
+        )
+
+        if stopped:
+            self.stdout.write(self.style.WARNING('\n⏸️  Time limit reached; run the command again to continue.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('\n✅ Archival completed!'))
+        self.stdout.write('💡 Archived history is still served by get_session_history, straight from the segment files.')
+
+    def archive(self, writer, session_ids, options):
+        """Write one chunk of sessions to the archive, mark them archived, then drop their rows"""
+        messages = Message.objects.filter(session_id__in=list(session_ids)).order_by(
+            'session_id', 'timestamp', 'id'
+        ).values('session_id', *ARCHIVE_FIELDS).iterator(chunk_size=2000)
+
+        locations = {}
+        for session_pk, rows in groupby(messages, key=lambda row: row['session_id']):
+            rows = [{field: row[field] for field in ARCHIVE_FIELDS} for row in rows]
+            locations[session_pk] = writer.write(session_ids[session_pk], rows)
+            self.counts['messages'] += len(rows)
+            self.counts['bytes'] += locations[session_pk][2]
+
+        # Segments must be on disk before the rows they replace are deleted
+        writer.sync()
+
+        now = timezone.now()
+        archived = []
+        for session_pk in session_ids:
+            # Sessions without messages are marked archived with an empty location
+            segment, offset, length = locations.get(session_pk, ('', None, None))
+            archived.append(ChatSession(
+                pk=session_pk, archived_at=now, archive_segment=segment, archive_offset=offset, archive_length=length
+            ))
+
+        # History is read from the archive once a session is marked, so the
+        # rows can then be deleted in small transactions
+        with transaction.atomic():
+            ChatSession.objects.bulk_update(
+                archived, ['archived_at', 'archive_segment', 'archive_offset', 'archive_length']
+            )
+            # Feedback outlives the messages it points at
+            UserFeedback.objects.filter(session_id__in=list(session_ids), message__isnull=False).update(message=None)
+
+        self.delete_in_batches(Message.objects.filter(session_id__in=list(session_ids)), options['batch_size'])
+        self.counts['sessions'] += len(session_ids)
+
+    def delete_in_batches(self, queryset, batch_size):
+        """Delete the messages of queryset batch_size at a time, each DELETE committed on its own"""
+        total = 0
+        while True:
+            pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return total
+            _, deleted = Message.objects.filter(pk__in=pks).delete()
+            total += deleted.get(Message._meta.label, 0)
@@ -0,0 +1,124 @@
+# management/commands/backfill_analytics_rollups.py
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncHour
+from django.utils.dateparse import parse_date
+from chatbot.models import AnalyticsRollup, ChatAnalytics, ChatSession, Message, UserFeedback
+from chatbot.rollups import ALL_TIME, add_metrics, intent_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the analytics rollup tables from the raw session, message, feedback and event tables. '
+        'Days whose raw rows were removed by expire_sessions or archive_sessions would come out lower than '
+        'the stored rollups; those days and every day before them keep their stored rollups, and only the '
+        'days after them are rebuilt.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rollup rows per bulk insert',
+        )
+        parser.add_argument(
+            '--keep-before',
+            help='Keep the stored rollups of UTC days before this date (YYYY-MM-DD) instead of the detected '
+                 'retention cutoff; pass 1970-01-01 to rebuild everything',
+        )
+
+    def handle(self, *args, **options):
+        deltas = {}
+        hour = TruncHour('created_at', tzinfo=dt_timezone.utc)
+
+        # Sessions and messages are grouped per hour in the database
+        for row in ChatSession.objects.annotate(hour=hour).values('hour').annotate(count=Count('id')).order_by():
+            add_metrics(deltas, row['hour'], {'sessions': row['count']})
+
+        messages = Message.objects.annotate(hour=TruncHour('timestamp', tzinfo=dt_timezone.utc))
+        for row in messages.values('hour', 'message_type').annotate(count=Count('id')).order_by():
+            add_metrics(deltas, row['hour'], {f"messages:{row['message_type']}": row['count']})
+
+        feedback = UserFeedback.objects.annotate(hour=TruncHour('timestamp', tzinfo=dt_timezone.utc))
+        for row in feedback.values('hour', 'rating').annotate(count=Count('id'), total=Sum('rating')).order_by():
+            add_metrics(deltas, row['hour'], {
+                f"rating:{row['rating']}": row['count'],
+                'ratings:count': row['count'],
+                'ratings:sum': row['total'],
+            })
+
+        # Intent and confidence only exist in the event payloads
+        events = ChatAnalytics.objects.filter(event_type='message_sent').values_list('timestamp', 'event_data')
+        for timestamp, event_data in events.iterator(chunk_size=2000):
+            metrics = intent_metrics(event_data)
+            if metrics:
+                add_metrics(deltas, timestamp, metrics)
+
+        stored = self.stored_days()
+        if options['keep_before']:
+            day = parse_date(options['keep_before'])
+            if day is None:
+                raise CommandError('--keep-before must be a date (YYYY-MM-DD)')
+            cutoff = datetime.combine(day, time(), tzinfo=dt_timezone.utc)
+        else:
+            cutoff = self.retention_cutoff(deltas, stored)
+
+        if cutoff is not None:
+            deltas = self.after_cutoff(deltas, stored, cutoff)
+
+        rollups = [
+            AnalyticsRollup(granularity=granularity, bucket_start=bucket_start, metric=metric, value=value)
+            for (granularity, bucket_start, metric), value in sorted(deltas.items())
+        ]
+
+        # Swap the old rollups for the rebuilt ones in one transaction
+        replaced = AnalyticsRollup.objects.all()
+        if cutoff is not None:
+            replaced = replaced.filter(granularity='all') | replaced.filter(bucket_start__gte=cutoff)
+        with transaction.atomic():
+            deleted, _ = replaced.delete()
+            AnalyticsRollup.objects.bulk_create(rollups, batch_size=options['batch_size'])
+
+        if cutoff is not None:
+            self.stdout.write(f'🔒 Kept the stored hourly and daily rollups before {cutoff:%Y-%m-%d}')
+        self.stdout.write(f'🗑️  Removed {deleted} existing rollup rows')
+        self.stdout.write(f'📊 Wrote {len(rollups)} rollup rows')
+        self.stdout.write(self.style.SUCCESS('\n✅ Analytics rollups rebuilt!'))
+        self.stdout.write('💡 Run this while the analytics writer is idle; queued events are folded in on their next flush.')
+
+    def stored_days(self):
+        """The stored daily rollups as {(bucket_start, metric): value}"""
+        rows = AnalyticsRollup.objects.filter(granularity='day').values_list('bucket_start', 'metric', 'value')
+        return {(bucket_start, metric): value for bucket_start, metric, value in rows}
+
+    def retention_cutoff(self, deltas, stored):
+        """Start of the day after the last day that lost raw rows, or None.
+
+        expire_sessions and archive_sessions only remove rows, so a day whose
+        rebuilt count for any metric is below the stored one has lost rows
+        and cannot be rebuilt from the raw tables.
+        """
+        trimmed = [
+            bucket_start for (bucket_start, metric), value in stored.items()
+            if deltas.get(('day', bucket_start, metric), 0) < value
+        ]
+        return max(trimmed) + timedelta(days=1) if trimmed else None
+
+    def after_cutoff(self, deltas, stored, cutoff):
+        """Rebuilt buckets from cutoff on, with all-time totals that keep the stored days before it"""
+        kept = {
+            key: value for key, value in deltas.items()
+            if key[0] != 'all' and key[1] >= cutoff
+        }
+        for (bucket_start, metric), value in stored.items():
+            if bucket_start < cutoff:
+                key = ('all', ALL_TIME, metric)
+                kept[key] = kept.get(key, 0) + value
+        for (granularity, bucket_start, metric), value in deltas.items():
+            if granularity == 'day' and bucket_start >= cutoff:
+                key = ('all', ALL_TIME, metric)
+                kept[key] = kept.get(key, 0) + value
+        return kept
@@ -0,0 +1,247 @@
+# management/commands/benchmark_engine.py
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from chatbot.chatbot_engine import ChatbotEngine
+from chatbot.counters import faq_counters
+from chatbot.faq_index import get_faq_index, invalidate_faq_index
+from chatbot.models import FAQ
+from chatbot.quick_replies import invalidate_quick_reply_catalog
+from chatbot.response_cache import ResponseCache
+from chatbot.synthetic_corpus import SyntheticCorpus
+
+OPERATIONS = ('process_message', 'detect_intent', 'calculate_confidence', 'search_faqs')
+
+def summarize(timings_ns, elapsed_ns):
+    """Throughput and latency percentiles for one operation"""
+    cuts = statistics.quantiles(timings_ns, n=100, method='inclusive')
+    return {
+        'ops_per_sec': round(len(timings_ns) / (elapsed_ns / 1e9), 1) if elapsed_ns else 0.0,
+        'mean_us': round(statistics.fmean(timings_ns) / 1000, 2),
+        'p50_us': round(cuts[49] / 1000, 2),
+        'p95_us': round(cuts[94] / 1000, 2),
+        'p99_us': round(cuts[98] / 1000, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ChatbotEngine throughput, latency and allocations on synthetic corpora'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intents',
+            default='10,100,500',
+            help='Comma separated intent counts to benchmark',
+        )
+        parser.add_argument(
+            '--faqs',
+            default='100,10000,100000',
+            help='Comma separated FAQ corpus sizes to benchmark',
+        )
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=1000,
+            help='Number of messages timed per operation',
+        )
+        parser.add_argument(
+            '--alloc-messages',
+            type=int,
+            default=200,
+            help='Number of messages traced with tracemalloc per operation (0 to skip)',
+        )
+        parser.add_argument(
+            '--vocabulary',
+            type=int,
+            default=5000,
+            help='Number of distinct words in the synthetic corpus',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for corpus generation',
+        )
+        parser.add_argument(
+            '--cached',
+            action='store_true',
+            help='Keep the response cache enabled for process_message (default: uncached)',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the results to this JSON file',
+        )
+        parser.add_argument(
+            '--compare',
+            help='Compare against the results in a previous JSON file',
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+
+        intent_sizes = [int(value) for value in options['intents'].split(',')]
+        faq_sizes = [int(value) for value in options['faqs'].split(',')]
+
+        # Run in a throwaway test database (in-memory for SQLite)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = self.run(intent_sizes, faq_sizes, options)
+        finally:
+            # Flush queued view counts and drop caches built from the test data
+            faq_counters.flush()
+            invalidate_faq_index()
+            invalidate_quick_reply_catalog()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'meta': {
+                'generated_at': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'messages': options['messages'],
+                'vocabulary': options['vocabulary'],
+                'seed': options['seed'],
+                'cached': options['cached'],
+            },
+            'results': results,
+        }
+
+        if baseline:
+            self.compare(baseline, results)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"\n💾 Results saved to {options['output']}")
+
+        self.stdout.write(self.style.SUCCESS('\n✅ Benchmark completed!'))
+
+    def run(self, intent_sizes, faq_sizes, options):
+        corpus = SyntheticCorpus(options['vocabulary'], options['seed'])
+        results = []
+
+        self.stdout.write(
+            f'{"intents":>7}  {"FAQs":>7}  {"operation":<21}  {"msgs/s":>10}  {"p50 (us)":>9}  '
+            f'{"p95 (us)":>9}  {"p99 (us)":>9}  {"alloc peak (KiB)":>16}'
+        )
+
+        for faq_count in faq_sizes:
+            FAQ.objects.all().delete()
+            FAQ.objects.bulk_create([FAQ(**faq) for faq in corpus.faqs(faq_count)], batch_size=2000)
+            invalidate_faq_index()
+
+            started = time.perf_counter()
+            get_faq_index()
+            index_build = time.perf_counter() - started
+
+            for intent_count in intent_sizes:
+                intents, responses = corpus.intents(intent_count)
+                engine = ChatbotEngine(
+                    intents=intents,
+                    responses=responses,
+                    response_cache=None if options['cached'] else ResponseCache(maxsize=0),
+                )
+                messages = corpus.messages(options['messages'], intents)
+                intent_of = {message: engine.detect_intent(message) for message in messages}
+
+                operations = {
+                    'process_message': lambda message: engine.process_message(message, None),
+                    'detect_intent': engine.detect_intent,
+                    'calculate_confidence': lambda message: engine.calculate_confidence(message, intent_of[message]),
+                    'search_faqs': engine.search_faqs,
+                }
+
+                for name in OPERATIONS:
+                    result = {
+                        'intents': intent_count,
+                        'faqs': faq_count,
+                        'operation': name,
+                        'index_build_s': round(index_build, 3),
+                    }
+                    result.update(self.measure(operations[name], messages))
+                    result.update(self.trace(operations[name], messages[:options['alloc_messages']]))
+                    results.append(result)
+
+                    peak = result.get('alloc_peak_bytes')
+                    self.stdout.write(
+                        f"{intent_count:>7}  {faq_count:>7}  {name:<21}  {result['ops_per_sec']:>10.1f}  "
+                        f"{result['p50_us']:>9.1f}  {result['p95_us']:>9.1f}  {result['p99_us']:>9.1f}  "
+                        f"{peak / 1024 if peak is not None else 0:>16.1f}"
+                    )
+
+        return results
+
+    def measure(self, operation, messages):
+        """Time each call, after a short warm-up"""
+        for message in messages[:20]:
+            operation(message)
+
+        timings = []
+        started = time.perf_counter_ns()
+        for message in messages:
+            call_started = time.perf_counter_ns()
+            operation(message)
+            timings.append(time.perf_counter_ns() - call_started)
+        return summarize(timings, time.perf_counter_ns() - started)
+
+    def trace(self, operation, messages):
+        """Peak and retained allocations per call, in a separate tracemalloc pass"""
+        if not messages:
+            return {}
+
+        tracemalloc.start()
+        try:
+            peaks = []
+            before, _ = tracemalloc.get_traced_memory()
+            for message in messages:
+                tracemalloc.reset_peak()
+                baseline, _ = tracemalloc.get_traced_memory()
+                operation(message)
+                peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            after, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'alloc_peak_bytes': max(peaks),
+            'alloc_mean_peak_bytes': round(statistics.fmean(peaks)),
+            'alloc_retained_bytes_per_call': round((after - before) / len(messages), 1),
+        }
+
+    def compare(self, baseline, results):
+        """Print throughput and p95 changes against a previous run"""
+        previous = {
+            (result['intents'], result['faqs'], result['operation']): result
+            for result in baseline.get('results', [])
+        }
+
+        self.stdout.write('\n📊 Compared with baseline:')
+        for result in results:
+            old = previous.get((result['intents'], result['faqs'], result['operation']))
+            if old is None:
+                continue
+
+            throughput = (result['ops_per_sec'] / old['ops_per_sec'] - 1) * 100 if old['ops_per_sec'] else 0.0
+            p95 = (result['p95_us'] / old['p95_us'] - 1) * 100 if old['p95_us'] else 0.0
+            line = (
+                f"{result['intents']:>7}  {result['faqs']:>7}  {result['operation']:<21}  "
+                f"msgs/s {throughput:+7.1f}%  p95 {p95:+7.1f}%"
+            )
+            # Flag regressions of more than 10% in either direction that matters
+            if throughput < -10 or p95 > 10:
+                self.stdout.write(self.style.WARNING(line))
+            else:
+                self.stdout.write(line)
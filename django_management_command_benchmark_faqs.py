@@ -0,0 +1,99 @@
+# management/commands/benchmark_faqs.py
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from chatbot.faq_index import FAQIndex
+from chatbot.synthetic_corpus import SyntheticCorpus
+
+
+def legacy_search(faqs, message):
+    """The original per-message loop from ChatbotEngine.search_faqs"""
+    best_faq = None
+    best_score = 0
+
+    for faq in faqs:
+        score = 0
+        message_words = message.split()
+
+        # Check question similarity
+        question_words = faq['question'].lower().split()
+        common_words = set(message_words) & set(question_words)
+        score += len(common_words) * 2
+
+        # Check keyword matches
+        for keyword in faq['keywords']:
+            if keyword.lower() in message:
+                score += 2
+
+        # Bonus for high-priority FAQs
+        score += faq['priority'] * 0.5
+
+        if score > best_score and score >= 2:
+            best_score = score
+            best_faq = faq
+
+    return best_faq
+
+
+class Command(BaseCommand):
+    help = 'Benchmark BM25 FAQ ranking against the legacy full-scan loop on synthetic corpora'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='1000,10000,100000',
+            help='Comma separated corpus sizes to benchmark',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=50,
+            help='Number of queries to time per corpus size',
+        )
+        parser.add_argument(
+            '--vocabulary',
+            type=int,
+            default=5000,
+            help='Number of distinct words in the synthetic corpus',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for corpus generation',
+        )
+
+    def handle(self, *args, **options):
+        corpus = SyntheticCorpus(options['vocabulary'], options['seed'])
+
+        self.stdout.write(f'{"FAQs":>8}  {"build (s)":>10}  {"legacy p50 (ms)":>16}  {"bm25 p50 (ms)":>14}  {"speedup":>8}')
+
+        for size in [int(value) for value in options['sizes'].split(',')]:
+            faqs = [dict(faq, id=i) for i, faq in enumerate(corpus.faqs(size))]
+            queries = [corpus.sample(corpus.rng.randint(3, 12)) for _ in range(options['queries'])]
+
+            started = time.perf_counter()
+            index = FAQIndex(faqs)
+            build_time = time.perf_counter() - started
+
+            legacy_times = self._time(lambda query: legacy_search(faqs, query), queries)
+            bm25_times = self._time(index.search, queries)
+
+            legacy_p50 = statistics.median(legacy_times)
+            bm25_p50 = statistics.median(bm25_times)
+            self.stdout.write(
+                f'{size:>8}  {build_time:>10.2f}  {legacy_p50:>16.3f}  {bm25_p50:>14.3f}  '
+                f'{legacy_p50 / bm25_p50 if bm25_p50 else 0:>7.1f}x'
+            )
+
+        self.stdout.write(self.style.SUCCESS('\n✅ Benchmark completed!'))
+        self.stdout.write('💡 Legacy timings exclude the per-message FAQ table fetch the old loop also paid for.')
+
+    def _time(self, search, queries):
+        """Run each query once and return per-query latencies in milliseconds"""
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            search(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
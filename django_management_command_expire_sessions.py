@@ -0,0 +1,185 @@
+# management/commands/expire_sessions.py
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from chatbot.models import ChatAnalytics, ChatSession, Message, UserFeedback
+from chatbot.session_cache import invalidate_sessions
+
+# Child tables cleared before their sessions, feedback first since it also
+# references messages: (counter name, model)
+CHILD_TABLES = (
+    ('feedback', UserFeedback),
+    ('events', ChatAnalytics),
+    ('messages', Message),
+)
+
+
+class Command(BaseCommand):
+    help = 'Deactivate idle chat sessions and delete old ones with their messages, events and feedback, in bounded chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--idle-hours',
+            type=float,
+            default=24,
+            help='Deactivate active sessions with no activity for this many hours',
+        )
+        parser.add_argument(
+            '--delete-after-days',
+            type=float,
+            help='Also delete inactive sessions with no activity for this many days (default: keep them)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of sessions handled per chunk',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of child rows removed per DELETE statement',
+        )
+        parser.add_argument(
+            '--time-limit',
+            type=float,
+            help='Stop after the chunk running when this many seconds have passed; the next run resumes',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Seconds to sleep between chunks, to leave room for live traffic',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the sessions that would be deactivated and deleted',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--chunk-size and --batch-size must be positive')
+
+        now = timezone.now()
+        idle_cutoff = now - timedelta(hours=options['idle_hours'])
+        delete_cutoff = None
+        if options['delete_after_days'] is not None:
+            delete_cutoff = now - timedelta(days=options['delete_after_days'])
+            if delete_cutoff > idle_cutoff:
+                raise CommandError('--delete-after-days must not be shorter than --idle-hours')
+
+        # Both filters are served by the (is_active, updated_at) index. Sessions
+        # old enough to delete are deactivated first, so the delete pass only
+        # needs to look at inactive ones.
+        stale = ChatSession.objects.filter(is_active=True, updated_at__lt=idle_cutoff)
+        expired = ChatSession.objects.filter(is_active=False, updated_at__lt=delete_cutoff) if delete_cutoff else None
+
+        if options['dry_run']:
+            self.stdout.write(f'🔍 {stale.count()} sessions idle since before {idle_cutoff:%Y-%m-%d %H:%M} would be deactivated')
+            if expired is not None:
+                # Sessions deactivated by this run that are also old enough
+                also = stale.filter(updated_at__lt=delete_cutoff).count()
+                self.stdout.write(f'🔍 {expired.count() + also} sessions idle since before {delete_cutoff:%Y-%m-%d %H:%M} would be deleted')
+            return
+
+        self.counts = {'deactivated': 0, 'sessions': 0, 'feedback': 0, 'events': 0, 'messages': 0}
+        self.verbosity = options['verbosity']
+        self.deadline = time.monotonic() + options['time_limit'] if options['time_limit'] else None
+        self.stopped = False
+        started = time.perf_counter()
+
+        for chunk in self.chunks(stale, options):
+            self.deactivate(chunk, idle_cutoff)
+        self.report('Deactivation', started, ('deactivated',))
+
+        if expired is not None and not self.stopped:
+            deleting = time.perf_counter()
+            for chunk in self.chunks(expired, options):
+                self.delete(chunk, delete_cutoff, options['batch_size'])
+            self.report('Deletion', deleting, ('sessions', 'messages', 'events', 'feedback'))
+
+        elapsed = time.perf_counter() - started
+        rows = sum(self.counts.values())
+        self.stdout.write(f'\n📊 {rows} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)')
+
+        if self.stopped:
+            self.stdout.write(self.style.WARNING('\n⏸️  Time limit reached; run the command again to continue.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('\n✅ Session expiry completed!'))
+        self.stdout.write('💡 Each chunk is committed on its own, so an interrupted run can simply be restarted.')
+
+    def chunks(self, queryset, options):
+        """Yield lists of (pk, session_id, updated_at) in (updated_at, pk) order.
+
+        Pages are keyed on the last row of the previous chunk, so a chunk is
+        never revisited even if some of its rows were skipped.
+        """
+        last = None
+        while True:
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                self.stopped = True
+                return
+
+            page = queryset
+            if last is not None:
+                page = page.filter(Q(updated_at__gt=last[2]) | Q(updated_at=last[2], pk__gt=last[0]))
+            chunk = list(page.order_by('updated_at', 'pk').values_list('pk', 'session_id', 'updated_at')[:options['chunk_size']])
+            if not chunk:
+                return
+
+            yield chunk
+            last = chunk[-1]
+            if options['pause']:
+                time.sleep(options['pause'])
+
+    def deactivate(self, chunk, cutoff):
+        """Mark one chunk of sessions inactive with a single UPDATE"""
+        # Re-check the cutoff so a session that just got a message stays active
+        updated = ChatSession.objects.filter(
+            pk__in=[pk for pk, session_id, updated_at in chunk], is_active=True, updated_at__lt=cutoff
+        ).update(is_active=False)
+        invalidate_sessions([session_id for pk, session_id, updated_at in chunk])
+
+        self.counts['deactivated'] += updated
+        if self.verbosity > 1:
+            self.stdout.write(f'  • Deactivated {updated} sessions up to {chunk[-1][2]:%Y-%m-%d %H:%M}')
+
+    def delete(self, chunk, cutoff, batch_size):
+        """Delete one chunk of sessions in one transaction, their child rows first in small batches"""
+        with transaction.atomic():
+            # Re-check the cutoff with the sessions locked, before any child row
+            # goes: a session reactivated or sent a message since paging keeps
+            # its messages, events and feedback, and new ones wait for the commit
+            pks = list(ChatSession.objects.select_for_update().filter(
+                pk__in=[pk for pk, session_id, updated_at in chunk], is_active=False, updated_at__lt=cutoff
+            ).order_by('pk').values_list('pk', flat=True))
+
+            for name, model in CHILD_TABLES:
+                self.counts[name] += self.delete_in_batches(model, model.objects.filter(session_id__in=pks), batch_size)
+
+            _, deleted = ChatSession.objects.filter(pk__in=pks).delete()
+
+        self.counts['sessions'] += deleted.get(ChatSession._meta.label, 0)
+        if self.verbosity > 1:
+            self.stdout.write(f'  • Deleted {deleted.get(ChatSession._meta.label, 0)} sessions up to {chunk[-1][2]:%Y-%m-%d %H:%M}')
+
+    def delete_in_batches(self, model, queryset, batch_size):
+        """Delete the rows of queryset batch_size at a time, keeping each DELETE statement small"""
+        total = 0
+        while True:
+            pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return total
+            _, deleted = model.objects.filter(pk__in=pks).delete()
+            total += deleted.get(model._meta.label, 0)
+
+    def report(self, name, started, counters):
+        elapsed = time.perf_counter() - started
+        rows = sum(self.counts[counter] for counter in counters)
+        details = ', '.join(f'{self.counts[counter]} {counter}' for counter in counters)
+        self.stdout.write(f'{name}: {details} in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)')
@@ -0,0 +1,287 @@
+# management/commands/loadtest_chat.py
+import io
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from chatbot.analytics_writer import analytics_writer
+from chatbot.counters import faq_counters
+from chatbot.faq_index import invalidate_faq_index
+from chatbot.quick_replies import invalidate_quick_reply_catalog
+
+ACTIONS = ('start_session', 'send_message', 'submit_feedback', 'get_session_history')
+
+# Most SQL queries a single action may issue once caches are warm. A run
+# that goes over any of these fails, so query regressions show up in CI.
+QUERY_BUDGETS = {
+    'start_session': 2,  # INSERT session, INSERT welcome message
+    'send_message': 4,  # BEGIN, INSERT both messages, UPDATE session; +1 on a session cache miss
+    'submit_feedback': 2,  # INSERT feedback; +1 when a message id is given
+    'get_session_history': 2,  # Session lookup, one keyset page of messages
+}
+
+# Scripted conversations: what users typically type, in order
+CONVERSATIONS = [
+    ['hello', "I can't log in to my account", 'forgot_username', 'thanks, bye'],
+    ['hi there', 'I forgot my password', 'password_reset', 'the reset email never arrived', 'no_reset_email'],
+    ['how do I change my email address', 'change_email', 'and my phone number?', 'goodbye'],
+    ['I was charged twice this month', 'billing', 'refund_request', 'can I talk to a human', 'escalate'],
+    ['the app is really slow and keeps crashing', 'performance_issues', 'which browsers are supported', 'thanks'],
+    ['how do I enable two factor authentication', 'enable_2fa', 'I lost my 2fa device', 'lost_2fa_device'],
+    ['asdf qwerty', 'what?', 'help', 'login_help', 'account locked after too many attempts'],
+    ['good morning', 'how do I delete my account', 'delete_account', 'done'],
+]
+
+
+class TestClientTransport:
+    """Sends actions through Django's test client and counts their SQL queries"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def post(self, payload):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client()
+
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            response = client.post(self.path, json.dumps(payload), content_type='application/json')
+        return response.status_code, json.loads(response.content or b'{}'), len(queries)
+
+
+class HTTPTransport:
+    """Sends actions to a running server; query counts are not visible from here"""
+
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+
+    def post(self, payload):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload).encode(),
+            headers={'Content-Type': 'application/json'},
+            method='POST',
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read() or b'{}'), None
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b'{}'), None
+
+
+class ActionStats:
+    """Thread-safe latency, error and query samples per action"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {action: [] for action in ACTIONS}
+        self.queries = {action: [] for action in ACTIONS}
+        self.errors = {action: 0 for action in ACTIONS}
+        self.error_samples = []
+
+    def add(self, action, latency, status, body, queries):
+        with self._lock:
+            self.latencies[action].append(latency)
+            if queries is not None:
+                self.queries[action].append(queries)
+            if status >= 400:
+                self.errors[action] += 1
+                if len(self.error_samples) < 5:
+                    self.error_samples.append(f"{action}: HTTP {status} {body.get('error', '')}")
+
+    def summary(self, elapsed):
+        results = {}
+        for action in ACTIONS:
+            latencies = self.latencies[action]
+            if not latencies:
+                continue
+            cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+            queries = self.queries[action]
+            results[action] = {
+                'requests': len(latencies),
+                'errors': self.errors[action],
+                'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+                'p50_ms': round(cuts[49], 2),
+                'p95_ms': round(cuts[94], 2),
+                'p99_ms': round(cuts[98], 2),
+                'queries_mean': round(statistics.fmean(queries), 2) if queries else None,
+                'queries_max': max(queries) if queries else None,
+            }
+        return results
+
+
+class Command(BaseCommand):
+    help = 'Drive scripted conversations through the chat API and report throughput, latency and SQL queries per action'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help='Chat API URL of a running server (default: in-process test client on a throwaway test database)',
+        )
+        parser.add_argument(
+            '--conversations',
+            type=int,
+            default=200,
+            help='Number of conversations to run',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Number of conversations in flight at once',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=10.0,
+            help='Per-request timeout in seconds for --url runs',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for picking conversation scripts',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the results to this JSON file',
+        )
+        parser.add_argument(
+            '--no-budgets',
+            action='store_true',
+            help='Report query counts without failing on QUERY_BUDGETS',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        scripts = [rng.choice(CONVERSATIONS) for _ in range(options['conversations'])]
+
+        if options['url']:
+            report = self.run(HTTPTransport(options['url'], options['timeout']), scripts, options)
+        else:
+            # Run in a throwaway test database seeded with the bundled fixtures
+            test_settings = connection.settings_dict.setdefault('TEST', {})
+            test_name = test_settings.get('NAME')
+            if connection.vendor == 'sqlite':
+                # Shared-cache in-memory SQLite locks whole tables, so concurrent
+                # requests and the background writers need a file database
+                test_settings['NAME'] = os.path.join(tempfile.mkdtemp(), 'loadtest.sqlite3')
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                call_command('populate_faqs', stdout=io.StringIO())
+                report = self.run(TestClientTransport(reverse('chatbot:chatbot_api')), scripts, options)
+            finally:
+                # Write queued background work and drop caches built from the test data
+                analytics_writer.flush()
+                faq_counters.flush()
+                invalidate_faq_index()
+                invalidate_quick_reply_catalog()
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                test_settings['NAME'] = test_name
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"\n💾 Results saved to {options['output']}")
+
+        over_budget = [
+            f"{action}: {result['queries_max']} queries (budget {QUERY_BUDGETS[action]})"
+            for action, result in report['actions'].items()
+            if result['queries_max'] is not None and result['queries_max'] > QUERY_BUDGETS[action]
+        ]
+        if over_budget and not options['no_budgets']:
+            raise CommandError('Query budget exceeded:\n  ' + '\n  '.join(over_budget))
+
+        self.stdout.write(self.style.SUCCESS('\n✅ Load test completed!'))
+
+    def run(self, transport, scripts, options):
+        """Run every conversation and print the per-action results"""
+        # One untimed conversation warms the engine, FAQ index and catalogs
+        self.converse(transport, CONVERSATIONS[0], ActionStats(), random.Random(0))
+
+        stats = ActionStats()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(
+                lambda item: self.converse(transport, item[1], stats, random.Random(options['seed'] + item[0])),
+                enumerate(scripts)
+            ))
+        elapsed = time.perf_counter() - started
+
+        actions = stats.summary(elapsed)
+        total = sum(result['requests'] for result in actions.values())
+
+        self.stdout.write(
+            f'{"action":<20}  {"requests":>8}  {"errors":>6}  {"req/s":>8}  {"p50 (ms)":>9}  '
+            f'{"p95 (ms)":>9}  {"p99 (ms)":>9}  {"queries":>7}  {"budget":>6}'
+        )
+        for action, result in actions.items():
+            queries = f"{result['queries_mean']:.1f}" if result['queries_mean'] is not None else 'n/a'
+            self.stdout.write(
+                f"{action:<20}  {result['requests']:>8}  {result['errors']:>6}  {result['throughput_rps']:>8.1f}  "
+                f"{result['p50_ms']:>9.2f}  {result['p95_ms']:>9.2f}  {result['p99_ms']:>9.2f}  "
+                f"{queries:>7}  {QUERY_BUDGETS[action]:>6}"
+            )
+
+        self.stdout.write(
+            f'\n📊 {len(scripts)} conversations, {total} requests in {elapsed:.2f}s '
+            f'({total / elapsed:.1f} req/s) at concurrency {options["concurrency"]}'
+        )
+        for sample in stats.error_samples:
+            self.stdout.write(self.style.WARNING(f'  ⚠️  {sample}'))
+
+        return {
+            'meta': {
+                'generated_at': datetime.now().isoformat(),
+                'target': options['url'] or 'test-client',
+                'database': connection.vendor,
+                'conversations': len(scripts),
+                'concurrency': options['concurrency'],
+                'seed': options['seed'],
+                'elapsed_s': round(elapsed, 3),
+                'throughput_rps': round(total / elapsed, 1) if elapsed else 0.0,
+            },
+            'actions': actions,
+            'query_budgets': QUERY_BUDGETS,
+        }
+
+    def converse(self, transport, script, stats, rng):
+        """One conversation: start, send each scripted message, rate it, read the history"""
+
+        def act(action, payload):
+            started = time.perf_counter()
+            try:
+                status, body, queries = transport.post(dict(payload, action=action))
+            except Exception as e:
+                status, body, queries = 599, {'error': str(e)}, None
+            stats.add(action, (time.perf_counter() - started) * 1000, status, body, queries)
+            return body
+
+        session_id = act('start_session', {}).get('session_id')
+        if not session_id:
+            return
+
+        for content in script:
+            act('send_message', {'session_id': session_id, 'content': content})
+        act('submit_feedback', {'session_id': session_id, 'rating': rng.randint(1, 5), 'comment': 'load test'})
+        act('get_session_history', {'session_id': session_id})
@@ -0,0 +1,82 @@
+# middleware.py
+import json
+import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+from .timing import get_timing_settings, start_timer, stop_timer
+
+# Structured per-request timing lines; configure under LOGGING['loggers']
+logger = logging.getLogger('chatbot.timing')
+
+
+class ServerTimingMiddleware:
+    """Time each request's phases and SQL queries.
+
+    Sampled requests get a Server-Timing header (visible in the browser's
+    network panel) and one JSON log line on the ``chatbot.timing`` logger.
+    Views and the engine mark phases with ``timing.phase()``. When
+    CHATBOT_TIMING['enabled'] is False the middleware removes itself.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.options = get_timing_settings()
+        if not self.options['enabled']:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.sample_rate = self.options['sample_rate']
+        self.path_prefixes = tuple(self.options['path_prefixes'])
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        timer, token = self.start(request)
+        if timer is None:
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_timer(token)
+        return self.finish(request, response, timer)
+
+    async def __acall__(self, request):
+        timer, token = self.start(request)
+        if timer is None:
+            return await self.get_response(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_timer(token)
+        return self.finish(request, response, timer)
+
+    def start(self, request):
+        if not request.path.startswith(self.path_prefixes):
+            return None, None
+        return start_timer(self.sample_rate)
+
+    def finish(self, request, response, timer):
+        total = timer.total()
+
+        if self.options['header']:
+            response['Server-Timing'] = timer.server_timing(total)
+
+        if self.options['log']:
+            resolver_match = getattr(request, 'resolver_match', None)
+            logger.info(json.dumps({
+                'event': 'request_timing',
+                'method': request.method,
+                'path': request.path,
+                'view': resolver_match.view_name if resolver_match else None,
+                'action': getattr(request, 'chatbot_action', None),
+                'status': response.status_code,
+                **timer.as_dict(total),
+            }))
+
+        return response
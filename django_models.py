@@ -1,6 +1,7 @@
 # models.py
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 import uuid
 
 class ChatSession(models.Model):
@@ -12,9 +13,16 @@ class ChatSession(models.Model):
     is_active = models.BooleanField(default=True)
     user_agent = models.TextField(blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
+    archived_at = models.DateTimeField(null=True, blank=True, help_text="Messages moved to the archive")
+    archive_segment = models.CharField(max_length=255, blank=True)
+    archive_offset = models.BigIntegerField(null=True, blank=True)
+    archive_length = models.IntegerField(null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', 'updated_at']),
+        ]
 
     def __str__(self):
         return f"Session {self.session_id[:8]}"
@@ -57,6 +65,7 @@ class FAQ(models.Model):
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    slug = models.SlugField(max_length=100, unique=True, null=True, blank=True, help_text="Stable fixture key")
     category = models.CharField(max_length=20, choices=CATEGORIES, default='general')
     question = models.CharField(max_length=500)
     answer = models.TextField()
@@ -89,12 +98,23 @@ class FAQ(models.Model):
         return (self.helpful_votes / total_votes) * 100
 
 class QuickReply(models.Model):
+    # FAQ categories plus the sets offered at fixed points of a conversation
+    CATEGORIES = FAQ.CATEGORIES + [
+        ('welcome', 'Welcome Message'),
+        ('greeting', 'Greeting'),
+        ('default', 'Unrecognized Message'),
+        ('escalate', 'Human Handoff'),
+        ('goodbye', 'Goodbye'),
+    ]
+
+    slug = models.SlugField(max_length=100, unique=True, null=True, blank=True, help_text="Stable fixture key")
     title = models.CharField(max_length=100)
     payload = models.CharField(max_length=200)
-    category = models.CharField(max_length=20, choices=FAQ.CATEGORIES, default='general')
+    category = models.CharField(max_length=20, choices=CATEGORIES, default='general')
     order = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
     icon = models.CharField(max_length=50, blank=True, help_text="Emoji or icon class")
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order', 'title']
@@ -107,7 +127,8 @@ class ChatAnalytics(models.Model):
     session = models.ForeignKey(ChatSession, on_delete=models.CASCADE)
     event_type = models.CharField(max_length=50)
     event_data = models.JSONField(default=dict)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set by the analytics writer to when the event happened, not when it was flushed
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         verbose_name_plural = 'Chat Analytics'
@@ -139,3 +160,24 @@ class UserFeedback(models.Model):
 
     def __str__(self):
         return f"Rating: {self.rating}/5 - {self.timestamp.strftime('%Y-%m-%d')}"
+
+class AnalyticsRollup(models.Model):
+    GRANULARITIES = [
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+        ('all', 'All Time')
+    ]
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITIES)
+    bucket_start = models.DateTimeField()
+    metric = models.CharField(max_length=100)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Analytics Rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['granularity', 'metric', 'bucket_start'], name='unique_analytics_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} @ {self.granularity} {self.bucket_start.strftime('%Y-%m-%d %H:%M')}: {self.value}"
@@ -0,0 +1,8 @@
+# routing.py
+from django.urls import path
+from . import consumers
+
+# WebSocket routes, mounted by the project's asgi.py
+websocket_urlpatterns = [
+    path('chatbot/ws/chat/', consumers.ChatConsumer.as_asgi(), name='chatbot_ws'),
+]
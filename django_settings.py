@@ -15,6 +15,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'chatbot.middleware.ServerTimingMiddleware',
     # ... your existing middleware
 ]
 
@@ -78,3 +79,102 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ]
 }
+
+# FAQ ranking (BM25 over question, keywords and answer)
+CHATBOT_FAQ_RANKING = {
+    'k1': 1.2,
+    'b': 0.75,
+    'field_weights': {'question': 3.0, 'keywords': 2.0, 'answer': 1.0},
+    'priority_boost': 0.1,  # Added per priority point
+    'helpful_boost': 0.2,  # Multiplied by log(1 + helpful_votes)
+    'min_score': 2.0,  # Minimum text relevance for an FAQ answer
+}
+
+# Cache of engine responses keyed on the normalized message
+CHATBOT_RESPONSE_CACHE = {
+    'maxsize': 1024,
+    'ttl': 300,  # Seconds
+}
+
+# Buffered FAQ view/vote counters, flushed as batched F() updates
+CHATBOT_COUNTERS = {
+    'flush_interval': 5.0,  # Seconds between flushes
+    'batch_size': 500,  # FAQs per UPDATE statement
+}
+
+# Write-behind batching for ChatAnalytics events
+CHATBOT_ANALYTICS = {
+    'batch_size': 200,  # Rows per bulk_create
+    'flush_interval': 2.0,  # Seconds between background flushes
+    'max_queue_size': 10000,
+    'overflow_policy': 'drop_newest',  # 'drop_newest', 'drop_oldest' or 'block'
+    'block_timeout': 0.05,  # Seconds to wait for room under 'block'
+}
+
+# Cache used for chat session lookups (use a shared backend such as Redis or
+# Memcached in production so all workers see deactivations)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'chatbot',
+    }
+}
+
+CHATBOT_SESSION_CACHE = {
+    'alias': 'default',
+    'timeout': 600,  # Seconds a resolved session stays cached
+}
+
+# Conditional caching of the FAQ and quick reply endpoints. Content versions
+# are kept in this cache, so it must be shared by all workers in production.
+CHATBOT_CONTENT_CACHE = {
+    'alias': 'default',
+    'body_timeout': 300,  # Seconds a serialized response body is kept
+    'max_age': 60,  # Cache-Control max-age sent to clients
+    'recheck_interval': 5.0,  # Seconds before other workers' content changes reach the in-memory caches
+}
+
+# Per-request phase timing: Server-Timing header plus a JSON line on the
+# chatbot.timing logger
+CHATBOT_TIMING = {
+    'enabled': True,
+    'sample_rate': 1.0,  # Fraction of requests timed, e.g. 0.01 in production
+    'header': True,
+    'log': True,
+    'path_prefixes': ('/chatbot/',),
+}
+
+# Prometheus metrics served at /chatbot/metrics/. With several worker
+# processes, point multiprocess_dir at a directory they all share (and clear
+# it on deploy) so a scrape of any worker reports totals for all of them.
+CHATBOT_METRICS = {
+    'enabled': True,
+    'multiprocess_dir': None,  # e.g. '/run/chatbot-metrics'
+    'sync_interval': 5.0,  # Seconds between per-process snapshot writes
+}
+
+# WebSocket transport (Django Channels). Point ASGI_APPLICATION at the
+# project's asgi.py and serve it with daphne or uvicorn. The in-memory
+# channel layer needs no Redis but only reaches connections in the same
+# process; use channels_redis with several workers.
+ASGI_APPLICATION = 'chatbot_backend.asgi.application'
+
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    }
+}
+
+CHATBOT_WEBSOCKET = {
+    'session_recheck': 60.0,  # Seconds a connection trusts its resolved session
+    'max_frame_bytes': 16384,
+}
+
+# Cold storage for the messages of closed sessions (archive_sessions command).
+# History of archived sessions is read back from these segment files.
+CHATBOT_ARCHIVE = {
+    'directory': None,  # e.g. '/var/lib/chatbot/archive'; required to archive
+    'compression': 'gzip',  # or 'zstd' with the zstandard package installed
+    'level': 6,
+    'segment_bytes': 64 * 1024 * 1024,  # Start a new segment file past this size
+}
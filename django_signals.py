@@ -0,0 +1,48 @@
+# signals.py
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import receiver
+from .models import ChatSession, FAQ, QuickReply
+from .content_version import bump_content_version
+from .faq_index import invalidate_faq_index
+from .chatbot_engine import clear_response_cache
+from .session_cache import invalidate_session
+from .faq_search import install_search_backend
+from .quick_replies import invalidate_quick_reply_catalog
+from .timing import count_queries, get_timing_settings
+
+
+@receiver([post_save, post_delete], sender=FAQ)
+def faq_changed(sender, **kwargs):
+    """Rebuild the in-memory FAQ index and drop cached answers after FAQ rows change"""
+    invalidate_faq_index()
+    clear_response_cache()
+    bump_content_version('faq')
+
+
+@receiver([post_save, post_delete], sender=QuickReply)
+def quick_reply_changed(sender, **kwargs):
+    """Reload the quick reply catalog and drop responses that embed the old one"""
+    invalidate_quick_reply_catalog()
+    clear_response_cache()
+    bump_content_version('quick_reply')
+
+
+@receiver([post_save, post_delete], sender=ChatSession)
+def session_changed(sender, instance, **kwargs):
+    """Drop the cached session entry when a session row is saved or deleted"""
+    invalidate_session(instance.session_id)
+
+
+@receiver(post_migrate)
+def install_faq_search(sender, using='default', **kwargs):
+    """Create the FAQ full-text index once the chatbot tables exist"""
+    if sender.name == 'chatbot':
+        install_search_backend(using)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """Charge SQL queries on every new connection to the request being timed"""
+    if get_timing_settings()['enabled'] and count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
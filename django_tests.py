@@ -0,0 +1,308 @@
+# tests.py
+import io
+import json
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from .analytics_writer import analytics_writer
+from .chatbot_engine import ChatbotEngine
+from .content_version import bump_content_version
+from .counters import faq_counters
+from .faq_index import get_faq_index
+from .models import ChatSession, FAQ, Message, QuickReply
+from .quick_replies import DEFAULT_QUICK_REPLIES, get_quick_reply_catalog, invalidate_quick_reply_catalog
+
+
+class IntentMatchingTests(SimpleTestCase):
+    """Phrases match from a word start and accept simple inflections"""
+
+    def setUp(self):
+        self.engine = ChatbotEngine()
+
+    def test_inflected_forms_match(self):
+        cases = {
+            'I was charged twice this month': 'billing',
+            'where are my invoices': 'billing',
+            'refunds please': 'billing',
+            'payments failing': 'billing',
+            'my passwords dont work': 'password_reset',
+            'I have two accounts': 'account_details',
+            'logins fail': 'login_help',
+            'I logged in yesterday': 'login_help',
+        }
+        for message, intent in cases.items():
+            with self.subTest(message=message):
+                self.assertEqual(self.engine.detect_intent(message), intent)
+
+    def test_phrases_do_not_match_inside_words(self):
+        for message in ('this is it', 'his thing', 'which one'):
+            with self.subTest(message=message):
+                self.assertIsNone(self.engine.detect_intent(message))
+        self.assertEqual(self.engine.detect_intent('hi there'), 'greeting')
+
+
+class SendMessageQueryTests(TestCase):
+    """send_message stays within its per-message statement budget"""
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse('chatbot:chatbot_api')
+        self.session_id = self.post({'action': 'start_session'})['session_id']
+        # Warm the session cache, engine, FAQ index and quick reply catalog
+        self.post({'action': 'send_message', 'session_id': self.session_id, 'content': 'hello'})
+
+    def tearDown(self):
+        # Write queued background work inside the test transaction
+        analytics_writer.flush()
+        faq_counters.flush()
+
+    def post(self, data):
+        response = self.client.post(self.url, json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_exchange_is_one_atomic_insert_and_update(self):
+        saves = mock.patch.object(ChatSession, 'save', autospec=True, side_effect=AssertionError('session.save() called'))
+        with saves, CaptureQueriesContext(connection) as queries:
+            # SAVEPOINT, one INSERT for both messages, one UPDATE, RELEASE SAVEPOINT
+            with self.assertNumQueries(4):
+                body = self.post({'action': 'send_message', 'session_id': self.session_id, 'content': 'I forgot my password'})
+
+        statements = [query['sql'] for query in queries.captured_queries]
+        self.assertTrue(statements[0].startswith('SAVEPOINT'))
+        self.assertTrue(statements[-1].startswith('RELEASE SAVEPOINT'))
+
+        inserts = [sql for sql in statements if sql.startswith(f'INSERT INTO "{Message._meta.db_table}"')]
+        self.assertEqual(len(inserts), 1)
+
+        updates = [sql for sql in statements if sql.startswith(f'UPDATE "{ChatSession._meta.db_table}"')]
+        self.assertEqual(len(updates), 1)
+        # Only updated_at is written, not the whole row
+        self.assertIn('"updated_at"', updates[0])
+        self.assertNotIn('"user_agent"', updates[0])
+
+        stored = Message.objects.filter(id__in=[body['user_message']['id'], body['bot_message']['id']])
+        self.assertEqual(sorted(stored.values_list('message_type', flat=True)), ['bot', 'user'])
+
+
+class AsyncStartSessionTests(TestCase):
+    """The async view loads what it needs without sync ORM calls on the event loop"""
+
+    def tearDown(self):
+        analytics_writer.flush()
+
+    async def test_start_session_with_cold_quick_reply_catalog(self):
+        invalidate_quick_reply_catalog()
+        response = await AsyncClient().post(
+            reverse('chatbot:chatbot_api_async'), json.dumps({'action': 'start_session'}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        body = response.json()
+        titles = [reply['title'] for reply in body['message']['metadata']['quick_replies']]
+        self.assertEqual(titles, [reply['title'] for reply in DEFAULT_QUICK_REPLIES['welcome']])
+        self.assertTrue(await ChatSession.objects.filter(session_id=body['session_id']).aexists())
+
+
+class ConditionalContentTests(TestCase):
+    """FAQ responses revalidate from the cached version and change with the content"""
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse('chatbot:get_faqs')
+        self.faq = FAQ.objects.create(question='How do I reset my password?', answer='Use the reset link.')
+
+    def tearDown(self):
+        faq_counters.flush()
+
+    def test_matching_etag_is_answered_without_queries(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_content(self):
+        etag = self.client.get(self.url)['ETag']
+        self.faq.answer = 'Click "Forgot password" on the login page.'
+        self.faq.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['faqs'][0]['answer'], self.faq.answer)
+
+    def test_etag_changes_with_flushed_counters(self):
+        etag = self.client.get(self.url)['ETag']
+        for _ in range(5):
+            faq_counters.increment(self.faq.id, 'helpful_votes')
+        faq_counters.flush()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['faqs'][0]['helpful_votes'], 5)
+
+
+@override_settings(CHATBOT_CONTENT_CACHE={'recheck_interval': 0})
+class SharedVersionTests(TestCase):
+    """Per-process caches notice changes that bypassed this process's signals"""
+
+    def test_faq_index_rebuilds_after_a_bump(self):
+        index = get_faq_index()
+        FAQ.objects.bulk_create([FAQ(question='How do I export my data?', answer='Use the export page.')])
+        self.assertIs(get_faq_index(), index)
+
+        # As done by another worker or a bulk load
+        bump_content_version('faq')
+        rebuilt = get_faq_index()
+        self.assertIsNot(rebuilt, index)
+        self.assertIn('How do I export my data?', [faq['question'] for faq in rebuilt.faqs])
+
+    def test_quick_reply_catalog_reloads_after_a_bump(self):
+        get_quick_reply_catalog()
+        QuickReply.objects.bulk_create([QuickReply(title='Export Data', payload='export_data', category='account')])
+        bump_content_version('quick_reply')
+        self.assertEqual(get_quick_reply_catalog().replies('account'), [{'title': 'Export Data', 'payload': 'export_data'}])
+
+
+class StreamMessageTests(TestCase):
+    """A streamed exchange is stored even when the client leaves early"""
+
+    def tearDown(self):
+        analytics_writer.flush()
+
+    def test_exchange_is_saved_when_the_stream_is_closed_early(self):
+        client = Client()
+        url = reverse('chatbot:chatbot_api')
+        session_id = client.post(url, json.dumps({'action': 'start_session'}), content_type='application/json').json()['session_id']
+
+        response = client.post(url, json.dumps({
+            'action': 'stream_message', 'session_id': session_id, 'content': 'I forgot my password'
+        }), content_type='application/json')
+        events = iter(response.streaming_content)
+        self.assertTrue(next(events).startswith(b'event: message'))
+        # The client disconnects after the first event
+        response.close()
+
+        # The welcome message plus both messages of the exchange
+        stored = Message.objects.filter(session__session_id=session_id)
+        self.assertEqual(stored.count(), 3)
+        self.assertTrue(stored.filter(content='I forgot my password').exists())
+
+
+class HistoryCursorTests(TestCase):
+    """History pages chain through next_cursor, and since returns only newer messages"""
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse('chatbot:chatbot_api')
+        started = self.post({'action': 'start_session'})
+        self.session_id = started['session_id']
+        self.cursor = started['next_cursor']
+
+    def tearDown(self):
+        analytics_writer.flush()
+        faq_counters.flush()
+
+    def post(self, data, status=200):
+        response = self.client.post(self.url, json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, status, response.content)
+        return response.json()
+
+    def send(self, content):
+        return self.post({'action': 'send_message', 'session_id': self.session_id, 'content': content})
+
+    def history(self, **params):
+        return self.post(dict(params, action='get_session_history', session_id=self.session_id))
+
+    def test_pages_chain_through_next_cursor(self):
+        for content in ('hello', 'I forgot my password', 'billing question'):
+            self.send(content)
+        everything = [message['id'] for message in self.history(limit=200)['messages']]
+        self.assertEqual(len(everything), 7)
+
+        paged, cursor = [], None
+        while True:
+            page = self.history(limit=2, **({'cursor': cursor} if cursor else {}))
+            paged += [message['id'] for message in page['messages']]
+            cursor = page['next_cursor']
+            if not page['has_more']:
+                break
+        self.assertEqual(paged, everything)
+
+    def test_since_returns_only_newer_messages(self):
+        self.assertEqual(self.history(since=self.cursor)['messages'], [])
+
+        exchange = self.send('hello')
+        delta = self.history(since=self.cursor)
+        self.assertEqual(
+            [message['id'] for message in delta['messages']],
+            [exchange['user_message']['id'], exchange['bot_message']['id']]
+        )
+        self.assertEqual(delta['next_cursor'], exchange['next_cursor'])
+
+        # Nothing new: the client keeps its cursor
+        unchanged = self.history(since=exchange['next_cursor'])
+        self.assertEqual(unchanged['messages'], [])
+        self.assertEqual(unchanged['next_cursor'], exchange['next_cursor'])
+
+    def test_malformed_cursor_is_rejected(self):
+        for cursor in ('not-a-cursor', 'bm90fGF8dXVpZA==', '%%%'):
+            with self.subTest(cursor=cursor):
+                body = self.post({'action': 'get_session_history', 'session_id': self.session_id, 'cursor': cursor}, status=400)
+                self.assertEqual(body['error'], 'Invalid history cursor')
+
+
+class ArchivedHistoryTests(TestCase):
+    """History of an archived session is read back from its segment"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        archive = override_settings(CHATBOT_ARCHIVE={'directory': directory.name})
+        archive.enable()
+        self.addCleanup(archive.disable)
+
+        self.client = Client()
+        self.url = reverse('chatbot:chatbot_api')
+        self.session_id = self.post({'action': 'start_session'})['session_id']
+        for content in ('hello', 'I forgot my password'):
+            self.post({'action': 'send_message', 'session_id': self.session_id, 'content': content})
+
+    def tearDown(self):
+        analytics_writer.flush()
+        faq_counters.flush()
+
+    def post(self, data):
+        response = self.client.post(self.url, json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def history(self, **params):
+        return self.post(dict(params, action='get_session_history', session_id=self.session_id))
+
+    def test_history_is_unchanged_after_archival(self):
+        before = self.history()
+        ChatSession.objects.filter(session_id=self.session_id).update(
+            is_active=False, updated_at=timezone.now() - timedelta(days=60)
+        )
+        call_command('archive_sessions', stdout=io.StringIO())
+
+        self.assertFalse(Message.objects.filter(session__session_id=self.session_id).exists())
+        self.assertIsNotNone(ChatSession.objects.get(session_id=self.session_id).archived_at)
+
+        after = self.history()
+        self.assertEqual(after['messages'], before['messages'])
+        self.assertEqual(after['next_cursor'], before['next_cursor'])
+
+        # Cursors issued before archival keep paging the same way
+        first = self.history(limit=2)
+        rest = self.history(cursor=first['next_cursor'])
+        self.assertEqual(first['messages'] + rest['messages'], before['messages'])
+        self.assertEqual(self.history(since=before['next_cursor'])['messages'], [])
@@ -6,8 +6,11 @@ app_name = 'chatbot'
 
 urlpatterns = [
     path('api/chat/', views.ChatbotView.as_view(), name='chatbot_api'),
+    path('api/chat/async/', views.AsyncChatbotView.as_view(), name='chatbot_api_async'),
     path('api/faqs/', views.get_faqs, name='get_faqs'),
     path('api/quick-replies/', views.get_quick_replies, name='get_quick_replies'),
+    path('api/analytics/', views.get_analytics, name='get_analytics'),
+    path('metrics/', views.get_metrics, name='metrics'),
 ]
 
 # In your main project urls.py, include:
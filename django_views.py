@@ -1,27 +1,94 @@
 # views.py
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from asgiref.sync import sync_to_async
+import asyncio
+import base64
+import binascii
 import json
 import uuid
 import logging
-from datetime import datetime, timedelta
-from .models import ChatSession, Message, FAQ, QuickReply, ChatAnalytics, UserFeedback
-from .chatbot_engine import ChatbotEngine
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from .models import ChatSession, Message, FAQ, UserFeedback
+from .chatbot_engine import get_engine
+from .analytics_writer import analytics_writer
+from .archive import read_archived_messages
+from .content_version import conditional_content
+from .counters import faq_counters
+from .faq_search import search_faq_ids
+from .quick_replies import aget_quick_reply_catalog, get_quick_reply_catalog
+from .rollups import summarize_range
+from .metrics import observe_request, registry
+from .timing import current_timer, phase
+from .session_cache import (
+    adeactivate_session, aresolve_session, cache_session, deactivate_session, is_expired, resolve_session
+)
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# History paging: default and maximum page size, and the projected columns
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 200
+HISTORY_FIELDS = ('id', 'content', 'timestamp', 'message_type', 'metadata')
+HISTORY_SESSION_FIELDS = (
+    'pk', 'created_at', 'updated_at', 'archived_at', 'archive_segment', 'archive_offset', 'archive_length'
+)
+
+WELCOME_MESSAGE = (
+    "Hello! I'm your virtual assistant. I can help you with:\n\n"
+    "🔐 Login and authentication issues\n"
+    "🔑 Password recovery and reset\n"
+    "👤 Account management\n"
+    "💳 Billing and payments\n"
+    "🛡️ Security settings\n"
+    "🔧 Technical support\n\n"
+    "What can I help you with today?"
+)
+
+# Saves of streamed exchanges still running; the event loop only keeps weak
+# references to tasks
+_streamed_saves = set()
+
+
+def encode_history_cursor(timestamp, message_id):
+    """Opaque cursor for a (timestamp, id) position in a session's history"""
+    raw = f"{timestamp.isoformat()}|{message_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_history_cursor(cursor):
+    """Inverse of encode_history_cursor; raises ValueError when malformed"""
+    try:
+        timestamp, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), uuid.UUID(message_id)
+    except (TypeError, ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError('Invalid history cursor')
+
+
+def exchange_cursor(*messages):
+    """History cursor just past the latest of the given messages"""
+    latest = max(messages, key=lambda message: (message.timestamp, message.id))
+    return encode_history_cursor(latest.timestamp, latest.id)
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 class ChatbotView(View):
     """Main chatbot API view"""
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.chatbot = ChatbotEngine()
 
     @method_decorator(csrf_exempt)
     def dispatch(self, request, *args, **kwargs):
@@ -29,16 +96,37 @@ class ChatbotView(View):
 
     def post(self, request):
         """Handle POST requests for chatbot interactions"""
+        started = time.perf_counter()
+        response = self.handle_action(request)
+        self.record_metrics(request, response, started)
+        return response
+
+    def record_metrics(self, request, response, started):
+        """Count the request and its latency; query counts come from the request timer"""
+        timer = current_timer()
+        observe_request(
+            getattr(request, 'chatbot_action', None),
+            response.status_code,
+            time.perf_counter() - started,
+            timer.query_count if timer else None
+        )
+
+    def handle_action(self, request):
+        """Parse the request body and route it to the action handler"""
         try:
             # Parse JSON data
-            data = json.loads(request.body)
+            with phase('parse'):
+                data = json.loads(request.body)
             action = data.get('action')
+            request.chatbot_action = action
             
             # Route to appropriate handler
             if action == 'start_session':
                 return self.start_session(request, data)
             elif action == 'send_message':
                 return self.send_message(request, data)
+            elif action == 'stream_message':
+                return self.stream_message(request, data)
             elif action == 'submit_feedback':
                 return self.submit_feedback(request, data)
             elif action == 'get_session_history':
@@ -46,7 +134,9 @@ class ChatbotView(View):
             else:
                 return JsonResponse({
                     'error': 'Invalid action',
-                    'valid_actions': ['start_session', 'send_message', 'submit_feedback', 'get_session_history']
+                    'valid_actions': [
+                        'start_session', 'send_message', 'stream_message', 'submit_feedback', 'get_session_history'
+                    ]
                 }, status=400)
                 
         except json.JSONDecodeError:
@@ -62,45 +152,31 @@ class ChatbotView(View):
             user_agent = request.META.get('HTTP_USER_AGENT', '')
             ip_address = self.get_client_ip(request)
             
-            # Create new session
-            session = ChatSession.objects.create(
-                session_id=session_id,
-                user_agent=user_agent,
-                ip_address=ip_address
-            )
-            
-            # Create welcome message
-            welcome_content = (
-                "Hello! I'm your virtual assistant. I can help you with:\n\n"
-                "🔐 Login and authentication issues\n"
-                "🔑 Password recovery and reset\n"
-                "👤 Account management\n"
-                "💳 Billing and payments\n"
-                "🛡️ Security settings\n"
-                "🔧 Technical support\n\n"
-                "What can I help you with today?"
-            )
-            
-            welcome_message = Message.objects.create(
-                session=session,
-                message_type='bot',
-                content=welcome_content,
-                metadata={
-                    'quick_replies': self.get_initial_quick_replies(),
-                    'type': 'welcome_message'
-                }
-            )
+            # Create new session and its welcome message
+            with phase('db_write'):
+                session = ChatSession.objects.create(
+                    session_id=session_id,
+                    user_agent=user_agent,
+                    ip_address=ip_address
+                )
+                cache_session(session)
+                
+                welcome_message = Message.objects.create(
+                    session=session,
+                    message_type='bot',
+                    content=WELCOME_MESSAGE,
+                    metadata={
+                        'quick_replies': self.get_initial_quick_replies(),
+                        'type': 'welcome_message'
+                    }
+                )
             
             # Log analytics
-            ChatAnalytics.objects.create(
-                session=session,
-                event_type='session_started',
-                event_data={
-                    'user_agent': user_agent,
-                    'ip_address': ip_address,
-                    'timestamp': datetime.now().isoformat()
-                }
-            )
+            analytics_writer.record(session, 'session_started', {
+                'user_agent': user_agent,
+                'ip_address': ip_address,
+                'timestamp': datetime.now().isoformat()
+            })
             
             return JsonResponse({
                 'success': True,
@@ -111,7 +187,8 @@ class ChatbotView(View):
                     'timestamp': welcome_message.timestamp.isoformat(),
                     'type': 'bot',
                     'metadata': welcome_message.metadata
-                }
+                },
+                'next_cursor': exchange_cursor(welcome_message)
             })
             
         except Exception as e:
@@ -125,77 +202,31 @@ class ChatbotView(View):
             content = data.get('content', '').strip()
             
             # Validate input
-            if not session_id:
-                return JsonResponse({'error': 'Session ID is required'}, status=400)
-            if not content:
-                return JsonResponse({'error': 'Message content is required'}, status=400)
-            if len(content) > 1000:  # Prevent spam
-                return JsonResponse({'error': 'Message too long (max 1000 characters)'}, status=400)
+            error = self.validate_message(session_id, content)
+            if error:
+                return JsonResponse({'error': error}, status=400)
                 
             # Get session
-            session = get_object_or_404(
-                ChatSession, 
-                session_id=session_id, 
-                is_active=True
-            )
+            with phase('session'):
+                session = resolve_session(session_id)
             
             # Check session age (expire after 24 hours)
-            if (datetime.now() - session.created_at.replace(tzinfo=None)).days > 1:
-                session.is_active = False
-                session.save()
+            if is_expired(session):
+                deactivate_session(session)
                 return JsonResponse({'error': 'Session expired. Please start a new session.'}, status=401)
             
-            # Create user message
-            user_message = Message.objects.create(
-                session=session,
-                message_type='user',
-                content=content
-            )
-            
             # Process message with chatbot engine
-            bot_response = self.chatbot.process_message(content, session)
-            
-            # Create bot response message
-            bot_message = Message.objects.create(
-                session=session,
-                message_type='bot',
-                content=bot_response['content'],
-                metadata=bot_response.get('metadata', {})
-            )
+            with phase('engine'):
+                bot_response = get_engine().process_message(content, session)
             
-            # Update session timestamp
-            session.updated_at = datetime.now()
-            session.save()
+            # Store both messages and touch the session in one transaction
+            with phase('db_write'):
+                user_message, bot_message = self.save_exchange(session, content, bot_response)
             
             # Log analytics
-            ChatAnalytics.objects.create(
-                session=session,
-                event_type='message_sent',
-                event_data={
-                    'user_message': content,
-                    'bot_response': bot_response['content'],
-                    'intent': bot_response.get('intent'),
-                    'confidence': bot_response.get('confidence'),
-                    'timestamp': datetime.now().isoformat()
-                }
-            )
+            self.record_message_sent(session, content, bot_response)
             
-            return JsonResponse({
-                'success': True,
-                'user_message': {
-                    'id': str(user_message.id),
-                    'content': user_message.content,
-                    'timestamp': user_message.timestamp.isoformat(),
-                    'type': 'user'
-                },
-                'bot_message': {
-                    'id': str(bot_message.id),
-                    'content': bot_message.content,
-                    'timestamp': bot_message.timestamp.isoformat(),
-                    'type': 'bot',
-                    'metadata': bot_message.metadata
-                }
-            })
+            return JsonResponse(self.exchange_body(user_message, bot_message))
             
         except ChatSession.DoesNotExist:
             return JsonResponse({'error': 'Invalid session ID'}, status=404)
@@ -218,7 +249,8 @@ class ChatbotView(View):
                 return JsonResponse({'error': 'Rating must be between 1 and 5'}, status=400)
             
             # Get session
-            session = get_object_or_404(ChatSession, session_id=session_id)
+            with phase('session'):
+                session = resolve_session(session_id, active_only=False)
             message = None
             
             # Get message if provided
@@ -233,35 +265,24 @@ class ChatbotView(View):
                 if message.metadata.get('type') == 'faq_response':
                     faq_id = message.metadata.get('faq_id')
                     if faq_id:
-                        try:
-                            faq = FAQ.objects.get(id=faq_id)
-                            if rating >= 4:
-                                faq.helpful_votes += 1
-                            else:
-                                faq.not_helpful_votes += 1
-                            faq.save()
-                        except FAQ.DoesNotExist:
-                            pass
+                        faq_counters.increment(faq_id, 'helpful_votes' if rating >= 4 else 'not_helpful_votes')
             
             # Create feedback record
-            feedback = UserFeedback.objects.create(
-                session=session,
-                message=message,
-                rating=rating,
-                comment=comment[:500]  # Limit comment length
-            )
+            with phase('db_write'):
+                feedback = UserFeedback.objects.create(
+                    session=session,
+                    message=message,
+                    rating=rating,
+                    comment=comment[:500]  # Limit comment length
+                )
             
             # Log analytics
-            ChatAnalytics.objects.create(
-                session=session,
-                event_type='feedback_submitted',
-                event_data={
-                    'rating': rating,
-                    'comment': comment,
-                    'message_id': str(message_id) if message_id else None,
-                    'timestamp': datetime.now().isoformat()
-                }
-            )
+            analytics_writer.record(session, 'feedback_submitted', {
+                'rating': rating,
+                'comment': comment,
+                'message_id': str(message_id) if message_id else None,
+                'timestamp': datetime.now().isoformat()
+            })
             
             return JsonResponse({
                 'success': True,
@@ -269,50 +290,289 @@ class ChatbotView(View):
                 'message': 'Thank you for your feedback!'
             })
             
+        except ChatSession.DoesNotExist:
+            return JsonResponse({'error': 'Invalid session ID'}, status=404)
         except Exception as e:
             logger.error(f"Error submitting feedback: {str(e)}")
             return JsonResponse({'error': 'Failed to submit feedback'}, status=500)
 
     def get_session_history(self, request, data):
-        """Get message history for a session"""
+        """Get a page of message history for a session.
+
+        Pages are keyed on (timestamp, id): pass the returned next_cursor
+        back as `cursor` to read the following page, or as `since` to fetch
+        only messages newer than the ones the client already has.
+        """
         try:
             session_id = data.get('session_id')
-            limit = data.get('limit', 50)  # Default to 50 messages
             
             if not session_id:
                 return JsonResponse({'error': 'Session ID is required'}, status=400)
             
+            try:
+                limit, after = self.parse_history_request(data)
+            except ValueError as e:
+                return JsonResponse({'error': str(e)}, status=400)
+            
             # Get session
-            session = get_object_or_404(ChatSession, session_id=session_id)
-            
-            # Get messages
-            messages = Message.objects.filter(session=session).order_by('timestamp')[:limit]
-            
-            # Format messages
-            message_list = []
-            for msg in messages:
-                message_list.append({
-                    'id': str(msg.id),
-                    'content': msg.content,
-                    'timestamp': msg.timestamp.isoformat(),
-                    'type': msg.message_type,
-                    'metadata': msg.metadata
-                })
+            session = ChatSession.objects.filter(session_id=session_id).values(*HISTORY_SESSION_FIELDS).first()
+            if session is None:
+                return JsonResponse({'error': 'Invalid session ID'}, status=404)
             
-            return JsonResponse({
-                'success': True,
-                'messages': message_list,
-                'session_info': {
-                    'id': session_id,
-                    'created_at': session.created_at.isoformat(),
-                    'updated_at': session.updated_at.isoformat()
-                }
-            })
+            # Get one extra row to know whether another page follows
+            if session['archived_at']:
+                with phase('archive_read'):
+                    rows = self.archived_history_rows(session, after, limit)
+            else:
+                with phase('db_read'):
+                    rows = list(self.history_queryset(session['pk'], after, limit))
+            
+            return JsonResponse(self.build_history_response(session_id, session, rows, limit, data))
             
         except Exception as e:
             logger.error(f"Error getting session history: {str(e)}")
             return JsonResponse({'error': 'Failed to get session history'}, status=500)
 
+    def parse_history_request(self, data):
+        """Validate the page size and decode the cursor of a history request"""
+        try:
+            limit = int(data.get('limit', HISTORY_PAGE_SIZE))
+        except (TypeError, ValueError):
+            raise ValueError('Limit must be a number')
+        limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+        
+        cursor = data.get('since') or data.get('cursor')
+        after = decode_history_cursor(cursor) if cursor else None
+        return limit, after
+
+    def history_queryset(self, session_pk, after, limit):
+        """Keyset query for the messages after a (timestamp, id) position"""
+        messages = Message.objects.filter(session_id=session_pk)
+        if after:
+            timestamp, message_id = after
+            messages = messages.filter(
+                Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=message_id)
+            )
+        
+        return messages.order_by('timestamp', 'id').values(*HISTORY_FIELDS)[:limit + 1]
+
+    def archived_history_rows(self, session, after, limit):
+        """The same page as history_queryset, read from the session's archive segment"""
+        if not session['archive_segment']:
+            return []  # The session had no messages to archive
+        rows = read_archived_messages(session['archive_segment'], session['archive_offset'], session['archive_length'])
+        if after:
+            rows = [row for row in rows if (row['timestamp'], row['id']) > after]
+        return rows[:limit + 1]
+
+    def build_history_response(self, session_id, session, rows, limit, data):
+        """Format a history page and the cursors the client should send next"""
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        message_list = [
+            {
+                'id': str(row['id']),
+                'content': row['content'],
+                'timestamp': row['timestamp'].isoformat(),
+                'type': row['message_type'],
+                'metadata': row['metadata']
+            }
+            for row in rows
+        ]
+        
+        # With nothing new the client keeps the cursor it already had
+        if rows:
+            next_cursor = encode_history_cursor(rows[-1]['timestamp'], rows[-1]['id'])
+        else:
+            next_cursor = data.get('since') or data.get('cursor')
+        
+        return {
+            'success': True,
+            'messages': message_list,
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'session_info': {
+                'id': session_id,
+                'created_at': session['created_at'].isoformat(),
+                'updated_at': session['updated_at'].isoformat()
+            }
+        }
+
+    def validate_message(self, session_id, content):
+        """Return the error for an invalid send/stream request, or None"""
+        if not session_id:
+            return 'Session ID is required'
+        if not content:
+            return 'Message content is required'
+        if len(content) > 1000:  # Prevent spam
+            return 'Message too long (max 1000 characters)'
+        return None
+
+    def build_exchange(self, session, content, bot_response):
+        """Unsaved user and bot messages for one exchange; ids are assigned up front"""
+        user_message = Message(
+            session=session,
+            message_type='user',
+            content=content
+        )
+        bot_message = Message(
+            session=session,
+            message_type='bot',
+            content=bot_response['content'],
+            metadata=bot_response.get('metadata', {})
+        )
+        return user_message, bot_message
+
+    def persist_exchange(self, session, user_message, bot_message):
+        """Persist a user message and its bot reply in a single transaction.
+
+        Both messages go in with one bulk INSERT and the session is touched
+        with a targeted UPDATE of updated_at instead of a full-row save.
+        """
+        with transaction.atomic():
+            Message.objects.bulk_create([user_message, bot_message])
+            ChatSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+
+    def save_exchange(self, session, content, bot_response):
+        """Build and persist one exchange"""
+        user_message, bot_message = self.build_exchange(session, content, bot_response)
+        self.persist_exchange(session, user_message, bot_message)
+        return user_message, bot_message
+
+    def record_message_sent(self, session, content, bot_response):
+        """Queue the message_sent analytics event"""
+        analytics_writer.record(session, 'message_sent', {
+            'user_message': content,
+            'bot_response': bot_response['content'],
+            'intent': bot_response.get('intent'),
+            'confidence': bot_response.get('confidence'),
+            'timestamp': datetime.now().isoformat()
+        })
+
+    def exchange_body(self, user_message, bot_message):
+        """Response body for a saved exchange, shared by every transport"""
+        return {
+            'success': True,
+            'user_message': {
+                'id': str(user_message.id),
+                'content': user_message.content,
+                'timestamp': user_message.timestamp.isoformat(),
+                'type': 'user'
+            },
+            'bot_message': {
+                'id': str(bot_message.id),
+                'content': bot_message.content,
+                'timestamp': bot_message.timestamp.isoformat(),
+                'type': 'bot',
+                'metadata': bot_message.metadata
+            },
+            'next_cursor': exchange_cursor(user_message, bot_message)
+        }
+
+    def stream_response(self, events):
+        """Wrap an SSE event iterator in an unbuffered streaming response"""
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+        return response
+
+    def reply_events(self, user_message, bot_message, bot_response):
+        """The events sent before persistence: the reply, then its quick replies"""
+        now = timezone.now().isoformat()
+        metadata = {key: value for key, value in bot_message.metadata.items() if key != 'quick_replies'}
+        yield sse_event('message', {
+            'success': True,
+            'user_message': {
+                'id': str(user_message.id),
+                'content': user_message.content,
+                'timestamp': now,
+                'type': 'user'
+            },
+            'bot_message': {
+                'id': str(bot_message.id),
+                'content': bot_message.content,
+                'timestamp': now,
+                'type': 'bot',
+                'metadata': metadata
+            }
+        })
+        yield sse_event('quick_replies', {
+            'message_id': str(bot_message.id),
+            'quick_replies': bot_response.get('metadata', {}).get('quick_replies', [])
+        })
+
+    def saved_event(self, user_message, bot_message):
+        """The final event, carrying the stored timestamps"""
+        return sse_event('done', {
+            'user_message': {'id': str(user_message.id), 'timestamp': user_message.timestamp.isoformat()},
+            'bot_message': {'id': str(bot_message.id), 'timestamp': bot_message.timestamp.isoformat()},
+            'next_cursor': exchange_cursor(user_message, bot_message)
+        })
+
+    def stream_message(self, request, data):
+        """Process a user message and stream the bot reply as Server-Sent Events.
+
+        The reply is sent as soon as the engine returns; the quick replies
+        follow as their own event, and the messages are written to the
+        database after both, ending the stream with a ``done`` event.
+        """
+        try:
+            session_id = data.get('session_id')
+            content = data.get('content', '').strip()
+            
+            # Validate input
+            error = self.validate_message(session_id, content)
+            if error:
+                return JsonResponse({'error': error}, status=400)
+            
+            # Get session
+            with phase('session'):
+                session = resolve_session(session_id)
+            
+            # Check session age (expire after 24 hours)
+            if is_expired(session):
+                deactivate_session(session)
+                return JsonResponse({'error': 'Session expired. Please start a new session.'}, status=401)
+            
+            # Process message with chatbot engine
+            with phase('engine'):
+                bot_response = get_engine().process_message(content, session)
+            
+            return self.stream_response(self.stream_exchange(session, content, bot_response))
+            
+        except ChatSession.DoesNotExist:
+            return JsonResponse({'error': 'Invalid session ID'}, status=404)
+        except Exception as e:
+            logger.error(f"Error streaming message: {str(e)}")
+            return JsonResponse({'error': 'Failed to process message'}, status=500)
+
+    def stream_exchange(self, session, content, bot_response):
+        """Yield the reply events, then persist the exchange"""
+        user_message, bot_message = self.build_exchange(session, content, bot_response)
+        try:
+            yield from self.reply_events(user_message, bot_message, bot_response)
+        finally:
+            # Also runs when a client disconnects mid-stream (GeneratorExit),
+            # so a reply the user saw is never missing from the history
+            saved = self.save_streamed_exchange(session, content, bot_response, user_message, bot_message)
+        
+        if saved:
+            yield self.saved_event(user_message, bot_message)
+        else:
+            yield sse_event('error', {'error': 'Failed to save message'})
+
+    def save_streamed_exchange(self, session, content, bot_response, user_message, bot_message):
+        """Persist a streamed exchange and log its analytics; returns whether it was saved"""
+        try:
+            self.persist_exchange(session, user_message, bot_message)
+        except Exception as e:
+            logger.error(f"Error saving streamed message: {str(e)}")
+            return False
+        
+        self.record_message_sent(session, content, bot_response)
+        return True
+
     def get_client_ip(self, request):
         """Get client IP address from request"""
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -324,18 +584,298 @@ class ChatbotView(View):
 
     def get_initial_quick_replies(self):
         """Get initial quick reply options"""
-        return [
-            {'title': '🔐 Login Issues', 'payload': 'login_help'},
-            {'title': '🔑 Password Reset', 'payload': 'password_reset'},
-            {'title': '👤 Account Details', 'payload': 'account_details'},
-            {'title': '📝 Sign Up Help', 'payload': 'signup_help'},
-            {'title': '💳 Billing Help', 'payload': 'billing'},
-            {'title': '❓ Other Questions', 'payload': 'other_questions'}
-        ]
+        return get_quick_reply_catalog().replies('welcome')
+
+class AsyncChatbotView(ChatbotView):
+    """Async chatbot API view for ASGI deployments.
+
+    Uses Django's async ORM so a single worker can hold many concurrent
+    sessions. Analytics go through the write-behind queue and engine
+    scoring runs in a worker thread, off the event loop.
+    """
+
+    async def post(self, request):
+        """Handle POST requests for chatbot interactions"""
+        started = time.perf_counter()
+        response = await self.handle_action(request)
+        self.record_metrics(request, response, started)
+        return response
+
+    async def handle_action(self, request):
+        """Parse the request body and route it to the action handler"""
+        try:
+            # Parse JSON data
+            with phase('parse'):
+                data = json.loads(request.body)
+            action = data.get('action')
+            request.chatbot_action = action
+            
+            # Route to appropriate handler
+            if action == 'start_session':
+                return await self.start_session(request, data)
+            elif action == 'send_message':
+                return await self.send_message(request, data)
+            elif action == 'stream_message':
+                return await self.stream_message(request, data)
+            elif action == 'submit_feedback':
+                return await self.submit_feedback(request, data)
+            elif action == 'get_session_history':
+                return await self.get_session_history(request, data)
+            else:
+                return JsonResponse({
+                    'error': 'Invalid action',
+                    'valid_actions': [
+                        'start_session', 'send_message', 'stream_message', 'submit_feedback', 'get_session_history'
+                    ]
+                }, status=400)
+                
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON format'}, status=400)
+        except Exception as e:
+            logger.error(f"Chatbot API error: {str(e)}")
+            return JsonResponse({'error': 'Internal server error'}, status=500)
+
+    async def start_session(self, request, data):
+        """Start a new chat session"""
+        try:
+            session_id = str(uuid.uuid4())
+            user_agent = request.META.get('HTTP_USER_AGENT', '')
+            ip_address = self.get_client_ip(request)
+            
+            # Create new session and its welcome message
+            with phase('db_write'):
+                session = await ChatSession.objects.acreate(
+                    session_id=session_id,
+                    user_agent=user_agent,
+                    ip_address=ip_address
+                )
+                cache_session(session)
+                
+                welcome_message = await Message.objects.acreate(
+                    session=session,
+                    message_type='bot',
+                    content=WELCOME_MESSAGE,
+                    metadata={
+                        'quick_replies': await self.aget_initial_quick_replies(),
+                        'type': 'welcome_message'
+                    }
+                )
+            
+            # Log analytics
+            analytics_writer.record(session, 'session_started', {
+                'user_agent': user_agent,
+                'ip_address': ip_address,
+                'timestamp': datetime.now().isoformat()
+            })
+            
+            return JsonResponse({
+                'success': True,
+                'session_id': session_id,
+                'message': {
+                    'id': str(welcome_message.id),
+                    'content': welcome_message.content,
+                    'timestamp': welcome_message.timestamp.isoformat(),
+                    'type': 'bot',
+                    'metadata': welcome_message.metadata
+                },
+                'next_cursor': exchange_cursor(welcome_message)
+            })
+            
+        except Exception as e:
+            logger.error(f"Error starting session: {str(e)}")
+            return JsonResponse({'error': 'Failed to start session'}, status=500)
+
+    async def send_message(self, request, data):
+        """Process user message and return bot response"""
+        try:
+            session_id = data.get('session_id')
+            content = data.get('content', '').strip()
+            
+            # Validate input
+            error = self.validate_message(session_id, content)
+            if error:
+                return JsonResponse({'error': error}, status=400)
+                
+            # Get session
+            with phase('session'):
+                session = await aresolve_session(session_id)
+            
+            # Check session age (expire after 24 hours)
+            if is_expired(session):
+                await adeactivate_session(session)
+                return JsonResponse({'error': 'Session expired. Please start a new session.'}, status=401)
+            
+            # Score the message in a worker thread, off the event loop
+            process_message = sync_to_async(get_engine().process_message, thread_sensitive=False)
+            with phase('engine'):
+                bot_response = await process_message(content, session)
+            
+            # Store both messages and touch the session in one transaction
+            with phase('db_write'):
+                user_message, bot_message = await sync_to_async(self.save_exchange)(session, content, bot_response)
+            
+            # Log analytics
+            self.record_message_sent(session, content, bot_response)
+            
+            return JsonResponse(self.exchange_body(user_message, bot_message))
+            
+        except ChatSession.DoesNotExist:
+            return JsonResponse({'error': 'Invalid session ID'}, status=404)
+        except Exception as e:
+            logger.error(f"Error processing message: {str(e)}")
+            return JsonResponse({'error': 'Failed to process message'}, status=500)
+
+    async def stream_message(self, request, data):
+        """Process a user message and stream the bot reply as Server-Sent Events"""
+        try:
+            session_id = data.get('session_id')
+            content = data.get('content', '').strip()
+            
+            # Validate input
+            error = self.validate_message(session_id, content)
+            if error:
+                return JsonResponse({'error': error}, status=400)
+            
+            # Get session
+            with phase('session'):
+                session = await aresolve_session(session_id)
+            
+            # Check session age (expire after 24 hours)
+            if is_expired(session):
+                await adeactivate_session(session)
+                return JsonResponse({'error': 'Session expired. Please start a new session.'}, status=401)
+            
+            # Score the message in a worker thread, off the event loop
+            process_message = sync_to_async(get_engine().process_message, thread_sensitive=False)
+            with phase('engine'):
+                bot_response = await process_message(content, session)
+            
+            return self.stream_response(self.astream_exchange(session, content, bot_response))
+            
+        except ChatSession.DoesNotExist:
+            return JsonResponse({'error': 'Invalid session ID'}, status=404)
+        except Exception as e:
+            logger.error(f"Error streaming message: {str(e)}")
+            return JsonResponse({'error': 'Failed to process message'}, status=500)
+
+    async def astream_exchange(self, session, content, bot_response):
+        """Yield the reply events while the exchange is persisted in a worker thread"""
+        user_message, bot_message = self.build_exchange(session, content, bot_response)
+        
+        # The save runs as a task of its own while the reply is sent, so it
+        # completes even if the client disconnects and the stream is dropped
+        saving = asyncio.ensure_future(sync_to_async(self.save_streamed_exchange)(
+            session, content, bot_response, user_message, bot_message
+        ))
+        _streamed_saves.add(saving)
+        saving.add_done_callback(_streamed_saves.discard)
+        
+        for event in self.reply_events(user_message, bot_message, bot_response):
+            yield event
+        
+        saved = await asyncio.shield(saving)
+        if saved:
+            yield self.saved_event(user_message, bot_message)
+        else:
+            yield sse_event('error', {'error': 'Failed to save message'})
+
+    async def aget_initial_quick_replies(self):
+        """Get initial quick reply options without blocking the event loop"""
+        return (await aget_quick_reply_catalog()).replies('welcome')
+
+    async def submit_feedback(self, request, data):
+        """Submit user feedback for a message"""
+        try:
+            session_id = data.get('session_id')
+            message_id = data.get('message_id')
+            rating = data.get('rating')
+            comment = data.get('comment', '')
+            
+            # Validate input
+            if not session_id:
+                return JsonResponse({'error': 'Session ID is required'}, status=400)
+            if rating not in [1, 2, 3, 4, 5]:
+                return JsonResponse({'error': 'Rating must be between 1 and 5'}, status=400)
+            
+            # Get session
+            with phase('session'):
+                session = await aresolve_session(session_id, active_only=False)
+            message = None
+            
+            # Get message if provided
+            if message_id:
+                message = await Message.objects.aget(id=message_id, session=session)
+                
+                # Update FAQ helpful votes if this was an FAQ response
+                if message.metadata.get('type') == 'faq_response':
+                    faq_id = message.metadata.get('faq_id')
+                    if faq_id:
+                        faq_counters.increment(faq_id, 'helpful_votes' if rating >= 4 else 'not_helpful_votes')
+            
+            # Create feedback record
+            with phase('db_write'):
+                feedback = await UserFeedback.objects.acreate(
+                    session=session,
+                    message=message,
+                    rating=rating,
+                    comment=comment[:500]  # Limit comment length
+                )
+            
+            # Log analytics
+            analytics_writer.record(session, 'feedback_submitted', {
+                'rating': rating,
+                'comment': comment,
+                'message_id': str(message_id) if message_id else None,
+                'timestamp': datetime.now().isoformat()
+            })
+            
+            return JsonResponse({
+                'success': True,
+                'feedback_id': str(feedback.id),
+                'message': 'Thank you for your feedback!'
+            })
+            
+        except (ChatSession.DoesNotExist, Message.DoesNotExist):
+            return JsonResponse({'error': 'Invalid session or message ID'}, status=404)
+        except Exception as e:
+            logger.error(f"Error submitting feedback: {str(e)}")
+            return JsonResponse({'error': 'Failed to submit feedback'}, status=500)
 
+    async def get_session_history(self, request, data):
+        """Get a page of message history for a session"""
+        try:
+            session_id = data.get('session_id')
+            
+            if not session_id:
+                return JsonResponse({'error': 'Session ID is required'}, status=400)
+            
+            try:
+                limit, after = self.parse_history_request(data)
+            except ValueError as e:
+                return JsonResponse({'error': str(e)}, status=400)
+            
+            # Get session
+            session = await ChatSession.objects.filter(session_id=session_id).values(*HISTORY_SESSION_FIELDS).afirst()
+            if session is None:
+                return JsonResponse({'error': 'Invalid session ID'}, status=404)
+            
+            # Get one extra row to know whether another page follows
+            if session['archived_at']:
+                with phase('archive_read'):
+                    rows = await sync_to_async(self.archived_history_rows, thread_sensitive=False)(session, after, limit)
+            else:
+                with phase('db_read'):
+                    rows = [row async for row in self.history_queryset(session['pk'], after, limit)]
+            
+            return JsonResponse(self.build_history_response(session_id, session, rows, limit, data))
+            
+        except Exception as e:
+            logger.error(f"Error getting session history: {str(e)}")
+            return JsonResponse({'error': 'Failed to get session history'}, status=500)
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@conditional_content('faq', 'faq_counters')
 def get_faqs(request):
     """Get FAQs with optional filtering"""
     try:
@@ -343,23 +883,24 @@ def get_faqs(request):
         search = request.GET.get('search', '')
         limit = int(request.GET.get('limit', 20))
         
-        # Start with active FAQs
-        faqs = FAQ.objects.filter(is_active=True)
-        
-        # Filter by category
-        if category != 'all' and category:
-            faqs = faqs.filter(category=category)
+        if category == 'all':
+            category = ''
         
-        # Search in questions and answers
         if search:
-            faqs = faqs.filter(
-                models.Q(question__icontains=search) |
-                models.Q(answer__icontains=search) |
-                models.Q(keywords__icontains=search)
-            )
-        
-        # Order by priority and helpfulness
-        faqs = faqs.order_by('-priority', '-helpful_votes')[:limit]
+            # Full-text search ranked by relevance, then priority
+            faq_ids = search_faq_ids(search, limit, category)
+            faqs_by_id = FAQ.objects.in_bulk(faq_ids)
+            faqs = [faqs_by_id[faq_id] for faq_id in faq_ids if faq_id in faqs_by_id]
+        else:
+            # Start with active FAQs
+            faqs = FAQ.objects.filter(is_active=True)
+            
+            # Filter by category
+            if category:
+                faqs = faqs.filter(category=category)
+            
+            # Order by priority and helpfulness
+            faqs = faqs.order_by('-priority', '-helpful_votes')[:limit]
         
         # Format response
         faqs_data = []
@@ -388,67 +929,109 @@ def get_faqs(request):
 
 @csrf_exempt 
 @require_http_methods(["GET"])
+@conditional_content('quick_reply')
 def get_quick_replies(request):
     """Get quick reply options by category"""
     try:
         category = request.GET.get('category', 'general')
         
-        # Get quick replies for category
-        replies = QuickReply.objects.filter(
-            category=category, 
-            is_active=True
-        ).order_by('order')
-        
-        # Format response
-        replies_data = []
-        for reply in replies:
-            replies_data.append({
-                'title': reply.title,
-                'payload': reply.payload,
-                'icon': reply.icon
-            })
-        
-        return JsonResponse({
-            'success': True,
-            'quick_replies': replies_data
-        })
+        # Served pre-serialized from the in-memory catalog
+        return HttpResponse(
+            get_quick_reply_catalog().response_json(category),
+            content_type='application/json'
+        )
         
     except Exception as e:
         logger.error(f"Error getting quick replies: {str(e)}")
         return JsonResponse({'error': 'Failed to get quick replies'}, status=500)
 
 
+def parse_analytics_bound(value):
+    """Parse an ISO date or datetime query parameter into an aware datetime"""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value}")
+        parsed = datetime(day.year, day.month, day.day)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def summarize_metrics(totals):
+    """Shape raw rollup metrics into the analytics response fields"""
+    breakdown = {
+        'sessions': totals.get('sessions', 0),
+        'messages': totals.get('messages:user', 0) + totals.get('messages:bot', 0),
+        'messages_by_type': {
+            'user': totals.get('messages:user', 0),
+            'bot': totals.get('messages:bot', 0),
+        },
+        'intents': {},
+        'confidence_histogram': {},
+        'ratings': {
+            'count': totals.get('ratings:count', 0),
+            'average': round(totals['ratings:sum'] / totals['ratings:count'], 2) if totals.get('ratings:count') else 0,
+            'distribution': {},
+        },
+    }
+
+    for metric, value in sorted(totals.items()):
+        kind, _, name = metric.partition(':')
+        if kind == 'intent':
+            breakdown['intents'][name] = value
+        elif kind == 'confidence':
+            breakdown['confidence_histogram'][name] = value
+        elif kind == 'rating':
+            breakdown['ratings']['distribution'][name] = value
+    return breakdown
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def get_analytics(request):
-    """Get basic analytics (admin only)"""
+    """Get analytics from the pre-aggregated rollups (admin only).
+
+    Optional ``start`` and ``end`` ISO dates or datetimes select the range
+    for the breakdown; it defaults to the last 7 days.
+    """
     try:
         # This would typically require admin authentication
         # For demo purposes, we'll return basic stats
         
-        from django.utils import timezone
-        from datetime import timedelta
-        
         now = timezone.now()
         week_ago = now - timedelta(days=7)
+
+        try:
+            start = parse_analytics_bound(request.GET['start']) if request.GET.get('start') else week_ago
+            end = parse_analytics_bound(request.GET['end']) if request.GET.get('end') else now
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        if start >= end:
+            return JsonResponse({'error': 'start must be before end'}, status=400)
+
+        # All-time totals and the requested range come from one rollup query
+        in_range, all_time = summarize_range(start, end)
+        if request.GET.get('start') or request.GET.get('end'):
+            week, _ = summarize_range(week_ago, now)
+        else:
+            week = in_range
         
-        # Basic stats
-        total_sessions = ChatSession.objects.count()
-        active_sessions = ChatSession.objects.filter(
-            created_at__gte=week_ago
-        ).count()
-        total_messages = Message.objects.count()
-        avg_rating = UserFeedback.objects.aggregate(
-            avg_rating=models.Avg('rating')
-        )['avg_rating'] or 0
+        overall = summarize_metrics(all_time)
         
         return JsonResponse({
             'success': True,
             'analytics': {
-                'total_sessions': total_sessions,
-                'active_sessions_this_week': active_sessions,
-                'total_messages': total_messages,
-                'average_rating': round(avg_rating, 2),
+                'total_sessions': overall['sessions'],
+                'active_sessions_this_week': week.get('sessions', 0),
+                'total_messages': overall['messages'],
+                'average_rating': overall['ratings']['average'],
+                'range': {
+                    'start': start.isoformat(),
+                    'end': end.isoformat(),
+                    **summarize_metrics(in_range)
+                },
                 'generated_at': now.isoformat()
             }
         })
@@ -456,3 +1039,11 @@ def get_analytics(request):
     except Exception as e:
         logger.error(f"Error getting analytics: {str(e)}")
         return JsonResponse({'error': 'Failed to get analytics'}, status=500)
+
+
+@require_http_methods(["GET"])
+def get_metrics(request):
+    """Expose chatbot metrics in the Prometheus text format"""
+    if not registry.enabled:
+        return JsonResponse({'error': 'Metrics are disabled'}, status=404)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
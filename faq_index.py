@@ -0,0 +1,180 @@
+# faq_index.py
+import threading
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from .content_version import VersionWatch
+from .intent_matcher import tokenize
+
+# Default BM25 parameters and boosts, overridable with CHATBOT_FAQ_RANKING
+DEFAULT_RANKING = {
+    'k1': 1.2,
+    'b': 0.75,
+    'field_weights': {'question': 3.0, 'keywords': 2.0, 'answer': 1.0},
+    'priority_boost': 0.1,
+    'helpful_boost': 0.2,
+    'min_score': 2.0,
+}
+
+
+def get_ranking_settings():
+    """Merge CHATBOT_FAQ_RANKING from settings over the defaults"""
+    ranking = dict(DEFAULT_RANKING)
+    ranking.update(getattr(settings, 'CHATBOT_FAQ_RANKING', {}))
+    return ranking
+
+
+class FAQIndex:
+    """BM25 index over the active FAQs.
+
+    Question, keyword and answer tokens are weighted per field and folded
+    into one sparse document-term matrix of BM25 weights, so a query is
+    scored with a single sparse matrix-vector product that only touches
+    FAQs sharing a term with the message. Priority and helpful votes are
+    added on top as tunable boosts.
+    """
+
+    def __init__(self, faqs, ranking=None):
+        self.ranking = ranking or get_ranking_settings()
+        field_weights = self.ranking['field_weights']
+
+        # FAQs are kept in rank order (-priority, -helpful_votes); a row in
+        # the matrix is the FAQ's position in this list
+        self.faqs = []
+        self.vocabulary = {}
+        rows, cols, values = [], [], []
+        doc_lengths = []
+        priorities = []
+        helpful_votes = []
+
+        for position, faq in enumerate(faqs):
+            self.faqs.append(faq)
+            priorities.append(faq['priority'])
+            helpful_votes.append(faq.get('helpful_votes', 0))
+
+            fields = {
+                'question': tokenize(faq['question']),
+                'keywords': tokenize(' '.join(str(keyword) for keyword in faq['keywords'] or [])),
+                'answer': tokenize(faq['answer']),
+            }
+
+            term_freqs = {}
+            length = 0.0
+            for field, tokens in fields.items():
+                weight = field_weights.get(field, 0.0)
+                length += weight * len(tokens)
+                for token in tokens:
+                    term_freqs[token] = term_freqs.get(token, 0.0) + weight
+
+            for token, freq in term_freqs.items():
+                if freq <= 0:
+                    continue
+                rows.append(position)
+                cols.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+                values.append(freq)
+            doc_lengths.append(length)
+
+        shape = (len(self.faqs), len(self.vocabulary))
+        self.matrix = self._bm25_matrix(rows, cols, values, doc_lengths, shape)
+
+        # Static per-FAQ boosts added to every query score
+        self.boosts = (
+            self.ranking['priority_boost'] * np.asarray(priorities, dtype=np.float64)
+            + self.ranking['helpful_boost'] * np.log1p(np.maximum(np.asarray(helpful_votes, dtype=np.float64), 0))
+        )
+
+    def _bm25_matrix(self, rows, cols, values, doc_lengths, shape):
+        """Turn raw weighted term frequencies into BM25 term weights"""
+        if not values:
+            return sparse.csc_matrix(shape, dtype=np.float64)
+
+        k1 = self.ranking['k1']
+        b = self.ranking['b']
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        tf = np.asarray(values, dtype=np.float64)
+        doc_lengths = np.asarray(doc_lengths, dtype=np.float64)
+
+        # Document frequency per term and the matching BM25 idf
+        doc_freq = np.bincount(cols, minlength=shape[1])
+        idf = np.log1p((shape[0] - doc_freq + 0.5) / (doc_freq + 0.5))
+
+        avg_length = doc_lengths.mean() or 1.0
+        norm = k1 * (1 - b + b * doc_lengths[rows] / avg_length)
+        weights = idf[cols] * tf * (k1 + 1) / (tf + norm)
+
+        # Column-major so a query only reads the columns of its own terms
+        return sparse.csc_matrix((weights, (rows, cols)), shape=shape)
+
+    @classmethod
+    def build(cls):
+        """Load the active FAQs from the database and index them"""
+        from .models import FAQ
+
+        faqs = FAQ.objects.filter(is_active=True).order_by('-priority', '-helpful_votes').values(
+            'id', 'question', 'answer', 'category', 'keywords', 'priority', 'helpful_votes'
+        )
+        return cls(faqs)
+
+    def query_vector(self, message):
+        """Sparse column vector marking the message terms known to the index"""
+        cols = sorted({self.vocabulary[token] for token in tokenize(message) if token in self.vocabulary})
+        return sparse.csc_matrix(
+            (np.ones(len(cols)), (cols, np.zeros(len(cols), dtype=np.int64))),
+            shape=(len(self.vocabulary), 1)
+        )
+
+    def search(self, message):
+        """Return the best matching FAQ dict for a message, or None"""
+        if not self.faqs:
+            return None
+
+        query = self.query_vector(message)
+        if not query.nnz:
+            return None
+
+        # One sparse product yields a score only for FAQs sharing a term
+        scores = (self.matrix @ query).tocoo()
+        if not scores.nnz:
+            return None
+
+        # Only FAQs with enough text relevance compete; boosts break the rest
+        relevant = scores.data >= self.ranking['min_score']
+        if not relevant.any():
+            return None
+
+        positions = scores.row[relevant]
+        totals = scores.data[relevant] + self.boosts[positions]
+
+        # Highest total first; ties go to the FAQ ranked earlier
+        best = np.lexsort((positions, -totals))[0]
+        return self.faqs[positions[best]]
+
+
+_index = None
+_index_lock = threading.Lock()
+_index_watch = VersionWatch('faq')
+
+
+def get_faq_index():
+    """Return the process-wide FAQ index, building it on first use or after FAQs change"""
+    global _index
+
+    if _index_watch.changed():
+        invalidate_faq_index()
+
+    index = _index
+    if index is None:
+        with _index_lock:
+            if _index is None:
+                _index = FAQIndex.build()
+            index = _index
+    return index
+
+
+def invalidate_faq_index():
+    """Drop the process-wide index so the next lookup rebuilds it"""
+    global _index
+
+    with _index_lock:
+        _index = None
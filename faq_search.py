@@ -0,0 +1,186 @@
+# faq_search.py
+import logging
+import uuid
+from django.db import DatabaseError, connections
+from .intent_matcher import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class FAQSearchBackend:
+    """Ranked FAQ search used by the get_faqs endpoint.
+
+    search() returns FAQ ids ordered by text relevance and then priority;
+    install() creates whatever database objects the backend relies on.
+    """
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def install(self):
+        """Create or refresh the search structures (run after migrate)"""
+
+    def search(self, text, limit, category=None):
+        raise NotImplementedError
+
+    def _table(self):
+        from .models import FAQ
+        return self.connection.ops.quote_name(FAQ._meta.db_table)
+
+
+class SQLiteFTS5Backend(FAQSearchBackend):
+    """SQLite FTS5 index kept in sync with the FAQ table by triggers.
+
+    The FTS table keeps its own copy of the text keyed on the FAQ id in an
+    UNINDEXED column. The FAQ table has a UUID primary key, so its rowid is
+    not an INTEGER PRIMARY KEY alias and VACUUM may renumber it; an index
+    keyed on rowid would then point at the wrong FAQs.
+    """
+
+    fts_table = 'chatbot_faq_search'
+
+    # Earlier external-content index keyed on the FAQ rowid
+    legacy_table = 'chatbot_faq_fts'
+
+    def install(self):
+        table = self._table()
+        fts = self.fts_table
+        legacy = self.legacy_table
+        statements = [
+            f"DROP TRIGGER IF EXISTS {legacy}_ai",
+            f"DROP TRIGGER IF EXISTS {legacy}_ad",
+            f"DROP TRIGGER IF EXISTS {legacy}_au",
+            f"DROP TABLE IF EXISTS {legacy}",
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"faq_id UNINDEXED, question, answer, keywords)",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(faq_id, question, answer, keywords) "
+            f"VALUES (new.id, new.question, new.answer, new.keywords); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM {fts} WHERE faq_id = old.id; END",
+            # Only text edits touch the index, not view or vote counters
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF question, answer, keywords ON {table} BEGIN "
+            f"DELETE FROM {fts} WHERE faq_id = old.id; "
+            f"INSERT INTO {fts}(faq_id, question, answer, keywords) "
+            f"VALUES (new.id, new.question, new.answer, new.keywords); END",
+            # Migrations may rebuild the FAQ table, so always resync
+            f"DELETE FROM {fts}",
+            f"INSERT INTO {fts}(faq_id, question, answer, keywords) "
+            f"SELECT id, question, answer, keywords FROM {table}",
+        ]
+        with self.connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def search(self, text, limit, category=None):
+        tokens = tokenize(text)
+        if not tokens:
+            return []
+
+        # Quoted prefix terms, all of which must match
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        table = self._table()
+        sql = (
+            f"SELECT f.id FROM {self.fts_table} "
+            f"JOIN {table} f ON f.id = {self.fts_table}.faq_id "
+            f"WHERE {self.fts_table} MATCH %s AND f.is_active"
+        )
+        params = [match]
+        if category:
+            sql += " AND f.category = %s"
+            params.append(category)
+        sql += f" ORDER BY bm25({self.fts_table}), f.priority DESC LIMIT %s"
+        params.append(limit)
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            # SQLite stores UUIDs as 32-character hex strings
+            return [uuid.UUID(row[0]) for row in cursor.fetchall()]
+
+
+class PostgresFullTextBackend(FAQSearchBackend):
+    """Postgres tsvector search backed by a GIN expression index"""
+
+    index_name = 'chatbot_faq_search_idx'
+    config = 'english'
+
+    def _document(self):
+        # Must match the indexed expression exactly for the GIN index to be used
+        return f"to_tsvector('{self.config}', question || ' ' || answer || ' ' || keywords::text)"
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.index_name} ON {self._table()} "
+                f"USING GIN ({self._document()})"
+            )
+
+    def search(self, text, limit, category=None):
+        document = self._document()
+        query = f"plainto_tsquery('{self.config}', %s)"
+        sql = (
+            f"SELECT id FROM {self._table()} "
+            f"WHERE {document} @@ {query} AND is_active"
+        )
+        params = [text]
+        if category:
+            sql += " AND category = %s"
+            params.append(category)
+        sql += f" ORDER BY ts_rank({document}, {query}) DESC, priority DESC LIMIT %s"
+        params.extend([text, limit])
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+class LikeSearchBackend(FAQSearchBackend):
+    """Portable fallback: substring match ordered by priority"""
+
+    def search(self, text, limit, category=None):
+        from django.db.models import Q
+        from .models import FAQ
+
+        faqs = FAQ.objects.using(self.using).filter(is_active=True).filter(
+            Q(question__icontains=text) |
+            Q(answer__icontains=text) |
+            Q(keywords__icontains=text)
+        )
+        if category:
+            faqs = faqs.filter(category=category)
+        return list(faqs.order_by('-priority', '-helpful_votes').values_list('id', flat=True)[:limit])
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTS5Backend,
+    'postgresql': PostgresFullTextBackend,
+}
+
+
+def get_search_backend(using='default'):
+    """Pick the full-text backend for the configured database"""
+    vendor = connections[using].vendor
+    return BACKENDS.get(vendor, LikeSearchBackend)(using)
+
+
+def install_search_backend(using='default'):
+    """Create the full-text structures, falling back to LIKE on failure"""
+    backend = get_search_backend(using)
+    try:
+        backend.install()
+    except Exception as e:
+        # e.g. SQLite builds without FTS5
+        logger.error(f"Could not install FAQ full-text search: {str(e)}")
+
+
+def search_faq_ids(text, limit, category=None, using='default'):
+    """Ranked FAQ ids for a search string, degrading to LIKE if full-text fails"""
+    try:
+        return get_search_backend(using).search(text, limit, category)
+    except DatabaseError as e:
+        logger.error(f"FAQ full-text search failed, falling back to LIKE: {str(e)}")
+        return LikeSearchBackend(using).search(text, limit, category)
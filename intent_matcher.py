@@ -0,0 +1,113 @@
+# intent_matcher.py
+import re
+
+# Apostrophes are dropped so "can't" and "cant" tokenize the same way
+_APOSTROPHES = re.compile(r"['’]")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return _TOKEN_RE.findall(_APOSTROPHES.sub('', text.lower()))
+
+
+# Inflection endings removed by stem(), longest first
+_SUFFIXES = ('ies', 'ing', 'ed', 'es', 's', 'e')
+
+# Doubled final consonants kept when an ending is removed ('billed', 'passing')
+_KEEP_DOUBLE = frozenset('lsz')
+
+
+def stem(token):
+    """Strip one simple inflection ending so 'charged', 'charges' and 'charge' agree.
+
+    At least three letters are always kept, so short words such as 'his'
+    never shrink into another word ('hi').
+    """
+    for suffix in _SUFFIXES:
+        if not token.endswith(suffix) or len(token) - len(suffix) < 3:
+            continue
+        base = token[:-len(suffix)]
+        if suffix == 's' and base.endswith('s'):
+            # 'access', 'pass'
+            return token
+        if suffix == 'ies':
+            return base + 'y'
+        if suffix in ('ing', 'ed') and base[-1] == base[-2] and base[-1] not in _KEEP_DOUBLE:
+            # 'logged' -> 'log', 'stopping' -> 'stop'
+            base = base[:-1]
+        return base
+    return token
+
+
+def stem_tokens(text):
+    """Tokenize text and stem every token"""
+    return [stem(token) for token in tokenize(text)]
+
+
+class IntentMatcher:
+    """Token trie over every intent pattern and keyword.
+
+    All phrases are compiled once into a single trie keyed by stemmed word
+    tokens, so one pass over a message finds every hit for every intent. A
+    phrase only matches from a word start ('hi' does not match 'this'),
+    while simple inflections still do ('invoices', 'charged', 'logging').
+    """
+
+    PATTERN = 0
+    KEYWORD = 1
+
+    def __init__(self, intents):
+        self.intent_names = tuple(intents)
+        self._root = {}
+        self._phrase_count = 0
+        self.max_depth = 0
+
+        for index, intent in enumerate(self.intent_names):
+            data = intents[intent]
+            for kind, phrases in ((self.PATTERN, data['patterns']), (self.KEYWORD, data['keywords'])):
+                for phrase in phrases:
+                    self._add(phrase, index, kind)
+
+    def _add(self, phrase, intent_index, kind):
+        tokens = stem_tokens(phrase)
+        if not tokens:
+            return
+
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+
+        # Terminal outputs live under the None key: (phrase id, intent, kind)
+        node.setdefault(None, []).append((self._phrase_count, intent_index, kind))
+        self._phrase_count += 1
+        self.max_depth = max(self.max_depth, len(tokens))
+
+    def match(self, message):
+        """Return {intent: (pattern_hits, keyword_hits)} for a message.
+
+        Each pattern or keyword counts once no matter how often it occurs,
+        matching the behaviour of the old substring checks.
+        """
+        tokens = stem_tokens(message)
+        seen = set()
+        hits = {}
+        root = self._root
+
+        for start in range(len(tokens)):
+            node = root
+            for token in tokens[start:start + self.max_depth]:
+                node = node.get(token)
+                if node is None:
+                    break
+                for phrase_id, intent_index, kind in node.get(None, ()):
+                    if phrase_id in seen:
+                        continue
+                    seen.add(phrase_id)
+                    counts = hits.setdefault(intent_index, [0, 0])
+                    counts[kind] += 1
+
+        return {
+            self.intent_names[index]: tuple(counts)
+            for index, counts in sorted(hits.items())
+        }
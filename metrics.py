@@ -0,0 +1,272 @@
+# metrics.py
+import glob
+import json
+import logging
+import os
+import threading
+from django.conf import settings
+from .background import PeriodicWorker
+
+logger = logging.getLogger(__name__)
+
+# Default registry settings, overridable with CHATBOT_METRICS
+DEFAULT_METRICS_SETTINGS = {
+    'enabled': True,
+    # Directory shared by all worker processes; each process writes its own
+    # snapshot there and the endpoint sums them. None keeps metrics per process.
+    'multiprocess_dir': None,
+    'sync_interval': 5.0,  # Seconds between snapshot writes
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50)
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+def get_metrics_settings():
+    """Merge CHATBOT_METRICS from settings over the defaults"""
+    options = dict(DEFAULT_METRICS_SETTINGS)
+    options.update(getattr(settings, 'CHATBOT_METRICS', {}))
+    return options
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = 'counter'
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dump(self):
+        return [[list(key), value] for key, value in self.values.items()]
+
+    @staticmethod
+    def merge(into, values):
+        for key, value in values:
+            key = tuple(key)
+            into[key] = into.get(key, 0) + value
+
+    def render(self, values):
+        if not values and not self.labelnames:
+            values = {(): 0}
+        lines = []
+        for key, value in sorted(values.items()):
+            lines.append(f'{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self.registry.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][position] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def dump(self):
+        return [[list(key), [list(counts), total, count]] for key, (counts, total, count) in self.values.items()]
+
+    @staticmethod
+    def merge(into, values):
+        for key, (counts, total, count) in values:
+            key = tuple(key)
+            state = into.setdefault(key, [[0] * len(counts), 0.0, 0])
+            state[0] = [mine + theirs for mine, theirs in zip(state[0], counts)]
+            state[1] += total
+            state[2] += count
+
+    def render(self, values):
+        lines = []
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key, [('le', '+Inf')])
+            lines.append(f'{self.name}_bucket{labels} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """In-process metrics rendered in the Prometheus text format.
+
+    In multiprocess mode every process periodically writes a JSON
+    snapshot of its own values to a shared directory, and a scrape of any
+    process sums all snapshots, with its own values taken live.
+    """
+
+    def __init__(self, enabled=True, multiprocess_dir=None, sync_interval=5.0):
+        self.enabled = enabled
+        self.multiprocess_dir = multiprocess_dir
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.worker = PeriodicWorker('chatbot-metrics-sync', sync_interval, self.write_snapshot)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def touched(self):
+        """Start the snapshot writer once the process records something"""
+        if self.multiprocess_dir:
+            self.worker.start()
+
+    def snapshot(self):
+        """JSON-serializable copy of this process's values"""
+        with self.lock:
+            return {name: metric.dump() for name, metric in self.metrics.items()}
+
+    def snapshot_path(self, pid=None):
+        return os.path.join(self.multiprocess_dir, f'chatbot-metrics-{pid or os.getpid()}.json')
+
+    def write_snapshot(self):
+        """Atomically replace this process's snapshot file"""
+        if not self.multiprocess_dir:
+            return
+        os.makedirs(self.multiprocess_dir, exist_ok=True)
+        path = self.snapshot_path()
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temporary, path)
+
+    def collect(self):
+        """Values summed over this process and every other process's snapshot"""
+        snapshots = [self.snapshot()]
+        if self.multiprocess_dir:
+            own = self.snapshot_path()
+            for path in glob.glob(os.path.join(self.multiprocess_dir, 'chatbot-metrics-*.json')):
+                if path == own:
+                    continue
+                try:
+                    with open(path) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError) as e:
+                    logger.error(f"Skipping unreadable metrics snapshot {path}: {str(e)}")
+
+        merged = {name: {} for name in self.metrics}
+        for snapshot in snapshots:
+            for name, values in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is not None:
+                    metric.merge(merged[name], values)
+        return merged
+
+    def render(self):
+        """Prometheus text exposition of every metric"""
+        lines = []
+        for name, values in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.render(values))
+        return '\n'.join(lines) + '\n'
+
+
+def _build_registry():
+    options = get_metrics_settings()
+    return MetricsRegistry(
+        enabled=options['enabled'],
+        multiprocess_dir=options['multiprocess_dir'],
+        sync_interval=options['sync_interval'],
+    )
+
+
+# Process-wide registry and the chatbot's metrics
+registry = _build_registry()
+
+requests_total = registry.counter(
+    'chatbot_requests', 'Chat API requests by action and status code', ('action', 'status'))
+request_duration = registry.histogram(
+    'chatbot_request_duration_seconds', 'Chat API latency by action', ('action',), LATENCY_BUCKETS)
+request_queries = registry.histogram(
+    'chatbot_request_queries', 'SQL queries per chat API request (timed requests only)', ('action',), QUERY_BUCKETS)
+db_queries_total = registry.counter(
+    'chatbot_db_queries', 'SQL queries issued by timed chat API requests', ('action',))
+intents_total = registry.counter(
+    'chatbot_intents', 'Responses by detected intent', ('intent',))
+intent_confidence = registry.histogram(
+    'chatbot_intent_confidence', 'Confidence of engine responses', (), CONFIDENCE_BUCKETS)
+faq_fallback_total = registry.counter(
+    'chatbot_faq_fallback', 'Messages answered from the FAQs because no intent matched')
+response_cache_total = registry.counter(
+    'chatbot_response_cache_lookups', 'Engine response cache lookups by result', ('result',))
+
+
+def observe_request(action, status, seconds, queries=None):
+    """Record one chat API request"""
+    if not registry.enabled:
+        return
+    action = action if action in (
+        'start_session', 'send_message', 'stream_message', 'submit_feedback', 'get_session_history'
+    ) else 'invalid'
+    requests_total.inc(action=action, status=status)
+    request_duration.observe(seconds, action=action)
+    if queries is not None:
+        request_queries.observe(queries, action=action)
+        db_queries_total.inc(queries, action=action)
+    registry.touched()
+
+
+def observe_response(response, cached):
+    """Record the intent, confidence and source of an engine response"""
+    if not registry.enabled:
+        return
+    response_cache_total.inc(result='hit' if cached else 'miss')
+    intents_total.inc(intent=response.get('intent') or 'unknown')
+    intent_confidence.observe(response.get('confidence') or 0.0)
+    if response['metadata'].get('type') == 'faq_response':
+        faq_fallback_total.inc()
+    registry.touched()
@@ -0,0 +1,173 @@
+# quick_replies.py
+import json
+import threading
+from asgiref.sync import sync_to_async
+from .content_version import VersionWatch
+
+# Used for categories with no active QuickReply rows (e.g. a fresh database)
+DEFAULT_QUICK_REPLIES = {
+    'login': [
+        {'title': 'Forgot Username', 'payload': 'forgot_username'},
+        {'title': 'Account Locked', 'payload': 'account_locked'},
+        {'title': 'Invalid Credentials', 'payload': 'invalid_credentials'},
+        {'title': 'Two-Factor Issues', 'payload': '2fa_issues'}
+    ],
+    'password': [
+        {'title': 'No Reset Email', 'payload': 'no_reset_email'},
+        {'title': 'Reset Link Expired', 'payload': 'reset_link_expired'},
+        {'title': 'Password Requirements', 'payload': 'password_requirements'}
+    ],
+    'account': [
+        {'title': 'Change Email', 'payload': 'change_email'},
+        {'title': 'Update Phone', 'payload': 'update_phone'},
+        {'title': 'Personal Info', 'payload': 'personal_info'},
+        {'title': 'Delete Account', 'payload': 'delete_account'}
+    ],
+    'signup': [
+        {'title': 'Email Verification', 'payload': 'email_verification'},
+        {'title': 'Account Activation', 'payload': 'account_activation'},
+        {'title': 'Registration Issues', 'payload': 'registration_issues'}
+    ],
+    'security': [
+        {'title': 'Enable 2FA', 'payload': 'enable_2fa'},
+        {'title': 'Security Tips', 'payload': 'security_tips'},
+        {'title': 'Suspicious Activity', 'payload': 'suspicious_activity'}
+    ],
+    'billing': [
+        {'title': 'View Invoice', 'payload': 'view_invoice'},
+        {'title': 'Update Payment', 'payload': 'update_payment'},
+        {'title': 'Refund Request', 'payload': 'refund_request'},
+        {'title': 'Billing Issues', 'payload': 'billing_issues'}
+    ],
+    'technical': [
+        {'title': 'Report Bug', 'payload': 'report_bug'},
+        {'title': 'Performance Issues', 'payload': 'performance_issues'},
+        {'title': 'Feature Not Working', 'payload': 'feature_not_working'},
+        {'title': 'Browser Issues', 'payload': 'browser_issues'}
+    ],
+    'general': [
+        {'title': '🔐 Login Help', 'payload': 'login_help'},
+        {'title': '🔑 Password Issues', 'payload': 'password_reset'},
+        {'title': '👤 Account Questions', 'payload': 'account_details'},
+        {'title': '💳 Billing Help', 'payload': 'billing'},
+        {'title': '🙋 Talk to Human', 'payload': 'escalate'}
+    ],
+    # Offered with the welcome message of a new session
+    'welcome': [
+        {'title': '🔐 Login Issues', 'payload': 'login_help'},
+        {'title': '🔑 Password Reset', 'payload': 'password_reset'},
+        {'title': '👤 Account Details', 'payload': 'account_details'},
+        {'title': '📝 Sign Up Help', 'payload': 'signup_help'},
+        {'title': '💳 Billing Help', 'payload': 'billing'},
+        {'title': '❓ Other Questions', 'payload': 'other_questions'}
+    ],
+    'greeting': [
+        {'title': '🔐 Login Issues', 'payload': 'login_help'},
+        {'title': '🔑 Password Reset', 'payload': 'password_reset'},
+        {'title': '👤 Account Details', 'payload': 'account_details'},
+        {'title': '📝 Sign Up Help', 'payload': 'signup_help'}
+    ],
+    # Offered when no intent or FAQ matches a message
+    'default': [
+        {'title': '🔐 Login Help', 'payload': 'login_help'},
+        {'title': '🔑 Password Issues', 'payload': 'password_reset'},
+        {'title': '👤 Account Questions', 'payload': 'account_details'},
+        {'title': '💳 Billing Help', 'payload': 'billing'},
+        {'title': '🙋 Talk to Human', 'payload': 'escalate'}
+    ],
+    'escalate': [
+        {'title': 'Continue with Bot', 'payload': 'continue_bot'},
+        {'title': 'Cancel Transfer', 'payload': 'cancel_transfer'}
+    ],
+    'goodbye': [],
+}
+
+
+class QuickReplyCatalog:
+    """Active quick replies grouped by category.
+
+    Each category keeps its replies in display order together with the
+    pre-serialized JSON body of the get_quick_replies endpoint, so serving
+    quick replies needs no queries and no per-request list building.
+    """
+
+    def __init__(self, rows):
+        grouped = {category: [] for category in DEFAULT_QUICK_REPLIES}
+        loaded = set()
+        for row in rows:
+            grouped.setdefault(row['category'], []).append({
+                'title': row['title'],
+                'payload': row['payload'],
+                'icon': row['icon']
+            })
+            loaded.add(row['category'])
+
+        # Categories without rows in the table fall back to the defaults
+        for category, defaults in DEFAULT_QUICK_REPLIES.items():
+            if category not in loaded:
+                grouped[category] = [dict(reply, icon='') for reply in defaults]
+
+        self._replies = {
+            category: tuple((reply['title'], reply['payload']) for reply in replies)
+            for category, replies in grouped.items()
+        }
+        self._json = {
+            category: json.dumps({'success': True, 'quick_replies': replies})
+            for category, replies in grouped.items()
+        }
+        self._empty_json = json.dumps({'success': True, 'quick_replies': []})
+
+    @classmethod
+    def load(cls):
+        """Read the active quick replies from the database"""
+        from .models import QuickReply
+
+        rows = QuickReply.objects.filter(is_active=True).order_by('category', 'order', 'title').values(
+            'category', 'title', 'payload', 'icon'
+        )
+        return cls(rows)
+
+    def replies(self, category):
+        """Fresh list of {'title', 'payload'} dicts for message metadata"""
+        return [{'title': title, 'payload': payload} for title, payload in self._replies.get(category, ())]
+
+    def response_json(self, category):
+        """Serialized get_quick_replies response body for a category"""
+        return self._json.get(category, self._empty_json)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+_catalog_watch = VersionWatch('quick_reply')
+
+
+def get_quick_reply_catalog():
+    """Return the process-wide catalog, loading it on first use or after quick replies change"""
+    global _catalog
+
+    if _catalog_watch.changed():
+        invalidate_quick_reply_catalog()
+
+    catalog = _catalog
+    if catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = QuickReplyCatalog.load()
+            catalog = _catalog
+    return catalog
+
+
+async def aget_quick_reply_catalog():
+    """Async get_quick_reply_catalog; loading and version checks run in a worker thread"""
+    catalog = _catalog
+    if catalog is None or _catalog_watch.due():
+        catalog = await sync_to_async(get_quick_reply_catalog)()
+    return catalog
+
+
+def invalidate_quick_reply_catalog():
+    """Drop the catalog so the next lookup reloads it"""
+    global _catalog
+
+    with _catalog_lock:
+        _catalog = None
@@ -0,0 +1,89 @@
+# response_cache.py
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+
+# Default cache size and lifetime, overridable with CHATBOT_RESPONSE_CACHE
+DEFAULT_CACHE_SETTINGS = {
+    'maxsize': 1024,
+    'ttl': 300,  # Seconds
+}
+
+
+def normalize_message(message):
+    """Cache key for a message: lowercase with whitespace collapsed"""
+    return ' '.join(message.lower().split())
+
+
+class ResponseCache:
+    """Thread-safe LRU cache with a per-entry time to live"""
+
+    def __init__(self, maxsize=1024, ttl=300, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, e.g. after FAQ or intent configuration changes"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit, miss and eviction counters plus current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+            }
+
+
+def build_response_cache():
+    """Create a ResponseCache sized from CHATBOT_RESPONSE_CACHE"""
+    options = dict(DEFAULT_CACHE_SETTINGS)
+    options.update(getattr(settings, 'CHATBOT_RESPONSE_CACHE', {}))
+    return ResponseCache(maxsize=options['maxsize'], ttl=options['ttl'])
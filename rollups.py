@@ -0,0 +1,122 @@
+# rollups.py
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+# All-time totals live in a single bucket at the epoch
+ALL_TIME = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Confidence histogram buckets: 0.0-0.1, 0.1-0.2, ... 0.9-1.0
+CONFIDENCE_BUCKETS = 10
+
+
+def hour_bucket(moment):
+    """Start of the UTC hour containing moment"""
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(moment):
+    """Start of the UTC day containing moment"""
+    return hour_bucket(moment).replace(hour=0)
+
+
+def confidence_metric(confidence):
+    """Histogram metric name for a confidence score"""
+    index = min(int(float(confidence) * CONFIDENCE_BUCKETS), CONFIDENCE_BUCKETS - 1)
+    return f"confidence:{index / CONFIDENCE_BUCKETS:.1f}"
+
+
+def intent_metrics(event_data):
+    """Intent and confidence histogram increments for a message_sent event"""
+    metrics = {}
+    if event_data.get('intent'):
+        metrics[f"intent:{event_data['intent']}"] = 1
+    if event_data.get('confidence') is not None:
+        metrics[confidence_metric(event_data['confidence'])] = 1
+    return metrics
+
+
+def event_metrics(event_type, event_data):
+    """Metric increments implied by one analytics event"""
+    if event_type == 'session_started':
+        # Every session opens with a bot welcome message
+        return {'sessions': 1, 'messages:bot': 1}
+
+    if event_type == 'message_sent':
+        return {'messages:user': 1, 'messages:bot': 1, **intent_metrics(event_data)}
+
+    if event_type == 'feedback_submitted' and event_data.get('rating'):
+        rating = int(event_data['rating'])
+        return {f'rating:{rating}': 1, 'ratings:count': 1, 'ratings:sum': rating}
+
+    return {}
+
+
+def add_metrics(deltas, moment, metrics):
+    """Accumulate metric increments into the hour, day and all-time buckets"""
+    for bucket in (('hour', hour_bucket(moment)), ('day', day_bucket(moment)), ('all', ALL_TIME)):
+        for metric, amount in metrics.items():
+            key = bucket + (metric,)
+            deltas[key] = deltas.get(key, 0) + amount
+
+
+def apply_deltas(deltas):
+    """Add accumulated increments to the rollup rows, creating missing ones"""
+    from .models import AnalyticsRollup
+
+    for (granularity, bucket_start, metric), amount in sorted(deltas.items()):
+        rows = AnalyticsRollup.objects.filter(granularity=granularity, bucket_start=bucket_start, metric=metric)
+        if rows.update(value=F('value') + amount):
+            continue
+        try:
+            with transaction.atomic():
+                AnalyticsRollup.objects.create(
+                    granularity=granularity, bucket_start=bucket_start, metric=metric, value=amount
+                )
+        except IntegrityError:
+            # Another process created the row first
+            rows.update(value=F('value') + amount)
+
+
+def record_events(events):
+    """Fold a batch of (event_type, event_data, occurred_at) into the rollups"""
+    deltas = {}
+    for event_type, event_data, occurred_at in events:
+        metrics = event_metrics(event_type, event_data)
+        if metrics:
+            add_metrics(deltas, occurred_at, metrics)
+    apply_deltas(deltas)
+
+
+def summarize_range(start, end):
+    """Sum every metric over [start, end) plus all-time totals, in one query.
+
+    Whole days inside the range are read from daily buckets and the partial
+    days at either end from hourly buckets, so the cost depends on the
+    length of the range in days, not on the size of the raw tables.
+    """
+    from .models import AnalyticsRollup
+
+    # Widen the range to whole hours, then split it into whole days and
+    # the leftover hours at either end
+    start = hour_bucket(start)
+    if hour_bucket(end) != end:
+        end = hour_bucket(end) + timedelta(hours=1)
+    first_day = day_bucket(start)
+    if first_day != start:
+        first_day += timedelta(days=1)
+    last_day = day_bucket(end)
+
+    query = Q(granularity='all')
+    if first_day < last_day:
+        query |= Q(granularity='day', bucket_start__gte=first_day, bucket_start__lt=last_day)
+        query |= Q(granularity='hour', bucket_start__gte=start, bucket_start__lt=first_day)
+        query |= Q(granularity='hour', bucket_start__gte=last_day, bucket_start__lt=end)
+    else:
+        query |= Q(granularity='hour', bucket_start__gte=start, bucket_start__lt=end)
+
+    in_range, all_time = {}, {}
+    for granularity, metric, value in AnalyticsRollup.objects.filter(query).values_list('granularity', 'metric', 'value'):
+        totals = all_time if granularity == 'all' else in_range
+        totals[metric] = totals.get(metric, 0) + value
+    return in_range, all_time
@@ -0,0 +1,119 @@
+# session_cache.py
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+# Default cache alias and entry lifetime, overridable with CHATBOT_SESSION_CACHE
+DEFAULT_SESSION_CACHE_SETTINGS = {
+    'alias': 'default',
+    'timeout': 600,  # Seconds
+}
+
+# Fields kept per session; enough to authorise and expire a chat request
+_CACHED_FIELDS = ('pk', 'created_at', 'is_active')
+
+
+def _options():
+    options = dict(DEFAULT_SESSION_CACHE_SETTINGS)
+    options.update(getattr(settings, 'CHATBOT_SESSION_CACHE', {}))
+    return options
+
+
+def _cache():
+    return caches[_options()['alias']]
+
+
+def _key(session_id):
+    return f"chatbot:session:{session_id}"
+
+
+def _to_session(session_id, entry):
+    """Build a ChatSession stand-in usable as a foreign key value"""
+    from .models import ChatSession
+
+    session = ChatSession(
+        id=entry['pk'],
+        session_id=session_id,
+        created_at=entry['created_at'],
+        is_active=entry['is_active']
+    )
+    session._state.adding = False
+    session._state.db = 'default'
+    return session
+
+
+def _entry_or_raise(entry, active_only):
+    from .models import ChatSession
+
+    if entry is None or (active_only and not entry['is_active']):
+        raise ChatSession.DoesNotExist('Chat session not found')
+    return entry
+
+
+def resolve_session(session_id, active_only=True):
+    """Return the ChatSession for session_id, served from the cache when possible.
+
+    Raises ChatSession.DoesNotExist for unknown sessions, and for inactive
+    ones when active_only is set.
+    """
+    from .models import ChatSession
+
+    cache = _cache()
+    entry = cache.get(_key(session_id))
+    if entry is None:
+        entry = ChatSession.objects.filter(session_id=session_id).values(*_CACHED_FIELDS).first()
+        if entry is not None:
+            cache.set(_key(session_id), entry, _options()['timeout'])
+
+    return _to_session(session_id, _entry_or_raise(entry, active_only))
+
+
+async def aresolve_session(session_id, active_only=True):
+    """Async version of resolve_session"""
+    from .models import ChatSession
+
+    cache = _cache()
+    entry = await cache.aget(_key(session_id))
+    if entry is None:
+        entry = await ChatSession.objects.filter(session_id=session_id).values(*_CACHED_FIELDS).afirst()
+        if entry is not None:
+            await cache.aset(_key(session_id), entry, _options()['timeout'])
+
+    return _to_session(session_id, _entry_or_raise(entry, active_only))
+
+
+def cache_session(session):
+    """Prime the cache with a freshly created session"""
+    entry = {'pk': session.pk, 'created_at': session.created_at, 'is_active': session.is_active}
+    _cache().set(_key(session.session_id), entry, _options()['timeout'])
+
+
+def invalidate_session(session_id):
+    """Forget the cached entry for a session"""
+    _cache().delete(_key(session_id))
+
+
+def invalidate_sessions(session_ids):
+    """Forget the cached entries for many sessions at once"""
+    _cache().delete_many([_key(session_id) for session_id in session_ids])
+
+
+def is_expired(session):
+    """Whether a session is past the chat expiry window"""
+    return (timezone.now() - session.created_at).days > 1
+
+
+def deactivate_session(session):
+    """Mark a session inactive and drop it from the cache"""
+    from .models import ChatSession
+
+    ChatSession.objects.filter(pk=session.pk).update(is_active=False)
+    invalidate_session(session.session_id)
+
+
+async def adeactivate_session(session):
+    """Async version of deactivate_session"""
+    from .models import ChatSession
+
+    await ChatSession.objects.filter(pk=session.pk).aupdate(is_active=False)
+    await _cache().adelete(_key(session.session_id))
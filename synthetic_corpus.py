@@ -0,0 +1,72 @@
+# synthetic_corpus.py
+import random
+
+# Message length buckets in words: (name, min, max, share of messages)
+MESSAGE_LENGTHS = (
+    ('short', 1, 3, 0.4),
+    ('medium', 4, 12, 0.4),
+    ('long', 13, 60, 0.2),
+)
+
+
+class SyntheticCorpus:
+    """Zipf-distributed vocabulary for generated intents, FAQs and messages, shared by the benchmark commands"""
+
+    def __init__(self, vocabulary, seed):
+        self.rng = random.Random(seed)
+        self.words = [f'term{i}' for i in range(vocabulary)]
+
+        # Zipf-like word frequencies, like natural language
+        self.cum_weights = []
+        total = 0.0
+        for rank in range(1, len(self.words) + 1):
+            total += 1.0 / rank
+            self.cum_weights.append(total)
+
+    def sample(self, count):
+        return ' '.join(self.rng.choices(self.words, cum_weights=self.cum_weights, k=count))
+
+    def intents(self, count):
+        """Intent definitions and matching responses"""
+        intents, responses = {}, {}
+        for i in range(count):
+            name = f'intent_{i}'
+            intents[name] = {
+                'patterns': [self.sample(self.rng.randint(1, 3)) for _ in range(6)],
+                'keywords': self.sample(7).split(),
+            }
+            responses[name] = {
+                'message': self.sample(20),
+                'quick_replies': [{'title': self.sample(2), 'payload': name}],
+            }
+        return intents, responses
+
+    def faqs(self, count):
+        """FAQ field values, as dicts"""
+        return [
+            {
+                'category': 'general',
+                'question': self.sample(self.rng.randint(6, 14)),
+                'answer': self.sample(self.rng.randint(30, 90)),
+                'keywords': self.sample(self.rng.randint(3, 7)).split(),
+                'priority': self.rng.randint(0, 10),
+                'helpful_votes': self.rng.randint(0, 200),
+            }
+            for _ in range(count)
+        ]
+
+    def messages(self, count, intents):
+        """Messages of varied length, mixing intent phrases into random text"""
+        patterns = [pattern for definition in intents.values() for pattern in definition['patterns']]
+        buckets = [(low, high) for name, low, high, share in MESSAGE_LENGTHS]
+        shares = [share for name, low, high, share in MESSAGE_LENGTHS]
+
+        messages = []
+        for _ in range(count):
+            low, high = self.rng.choices(buckets, weights=shares)[0]
+            words = self.sample(self.rng.randint(low, high)).split()
+            # About half the messages carry a known intent phrase
+            if patterns and self.rng.random() < 0.5:
+                words.insert(self.rng.randint(0, len(words)), self.rng.choice(patterns))
+            messages.append(' '.join(words))
+        return messages
@@ -0,0 +1,138 @@
+# timing.py
+import contextvars
+import random
+import time
+from contextlib import nullcontext
+from django.conf import settings
+
+# Default instrumentation settings, overridable with CHATBOT_TIMING
+DEFAULT_TIMING_SETTINGS = {
+    'enabled': True,
+    'sample_rate': 1.0,  # Fraction of requests timed
+    'header': True,  # Send a Server-Timing response header
+    'log': True,  # Write one structured log line per timed request
+    'path_prefixes': ('/',),  # Only requests under these paths are timed
+}
+
+# The timer of the request being handled, if it was sampled
+_current = contextvars.ContextVar('chatbot_request_timer', default=None)
+
+# Shared no-op context manager returned when nothing is being timed
+_NOT_TIMED = nullcontext()
+
+
+def get_timing_settings():
+    """Merge CHATBOT_TIMING from settings over the defaults"""
+    options = dict(DEFAULT_TIMING_SETTINGS)
+    options.update(getattr(settings, 'CHATBOT_TIMING', {}))
+    return options
+
+
+class _Phase:
+    """Context manager adding its wall time to one phase of a RequestTimer"""
+
+    __slots__ = ('timer', 'name', 'parent', 'started')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.parent = self.timer.active
+        self.timer.active = self.name
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        self.timer.active = self.parent
+        self.timer.durations[self.name] = self.timer.durations.get(self.name, 0.0) + elapsed
+        return False
+
+
+class RequestTimer:
+    """Phase durations and SQL query counts for one request.
+
+    Phases may nest (e.g. ``intent`` inside ``engine``); each query is
+    attributed to the innermost phase that was open when it ran.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+        self.queries = {}
+        self.query_count = 0
+        self.query_time = 0.0
+        self.active = None
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def record_query(self, elapsed):
+        self.query_count += 1
+        self.query_time += elapsed
+        key = self.active or 'other'
+        self.queries[key] = self.queries.get(key, 0) + 1
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        """Server-Timing header value, durations in milliseconds"""
+        entries = [f'{name};dur={elapsed * 1000:.2f}' for name, elapsed in self.durations.items()]
+        entries.append(f'db;dur={self.query_time * 1000:.2f};desc="{self.query_count} queries"')
+        entries.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(entries)
+
+    def as_dict(self, total):
+        """Structured summary for the request log line"""
+        return {
+            'total_ms': round(total * 1000, 2),
+            'phases_ms': {name: round(elapsed * 1000, 2) for name, elapsed in self.durations.items()},
+            'queries': self.query_count,
+            'queries_by_phase': dict(self.queries),
+            'db_ms': round(self.query_time * 1000, 2),
+        }
+
+
+def start_timer(sample_rate):
+    """Begin timing the current request if it is sampled; returns (timer, token)"""
+    if sample_rate < 1.0 and random.random() >= sample_rate:
+        return None, None
+    timer = RequestTimer()
+    return timer, _current.set(timer)
+
+
+def stop_timer(token):
+    """Stop timing the current request"""
+    if token is not None:
+        _current.reset(token)
+
+
+def current_timer():
+    """The RequestTimer of the request being handled, or None if it is not timed"""
+    return _current.get()
+
+
+def phase(name):
+    """Time a block as one phase of the current request.
+
+    Costs one context variable lookup when the request is not sampled.
+    """
+    timer = _current.get()
+    if timer is None:
+        return _NOT_TIMED
+    return timer.phase(name)
+
+
+def count_queries(execute, sql, params, many, context):
+    """Database execute wrapper charging each query to the current request"""
+    timer = _current.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.record_query(time.perf_counter() - started)